@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmark - latency and memory of search and design-system generation
+Usage: python benchmark.py [--repeat 20] [--scales 10 100 1000] [--output results.json]
+       python benchmark.py --compare before.json after.json
+       python benchmark.py --check-startup [--import-budget-ms 80] [--query-budget-ms 150]
+
+Sections (all timings in milliseconds):
+  cli          Cold-process CLI runs: fresh index cache, warm index cache (both --no-cache),
+               and repeated queries answered by the result cache
+  warm         In-process query latency per domain and per stack after preload
+  design       generate_design_system with and without --persist (memo cleared per run)
+  memory       Peak traced memory for loading every index and running the warm queries
+  scaling      Fit and query cost on synthetic corpora that repeat the shipped CSV rows
+  startup      Import time of `search.py --help` (python -X importtime) and one plain query (--no-cache)
+Results are printed (or written) as JSON so runs can be compared across commits.
+--check-startup measures only startup and exits 1 if it is over budget.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import core
+import design_system
+from core import AVAILABLE_STACKS, BM25, CSV_CONFIG, DATA_DIR, STACK_CONFIG, _STACK_COLS
+
+SCRIPT_DIR = Path(__file__).parent
+
+DOMAIN_QUERIES = {
+    "style": "glassmorphism dark mode",
+    "color": "saas dashboard",
+    "chart": "real-time trend",
+    "landing": "hero social-proof",
+    "product": "beauty spa wellness",
+    "ux": "animation accessibility",
+    "typography": "elegant luxury serif",
+    "icons": "navigation menu",
+    "react": "rerender memo",
+    "web": "focus keyboard"
+}
+STACK_QUERY = "layout responsive form"
+DESIGN_QUERIES = ["saas dashboard", "beauty spa wellness", "fintech crypto", "e-commerce luxury"]
+
+# Most calls are one short query, where interpreter start-up and imports dominate
+IMPORT_BUDGET_MS = 80
+QUERY_BUDGET_MS = 150
+
+
+def _summary(samples):
+    """Milliseconds summary of a list of second-valued samples"""
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "runs": len(ms),
+        "min": round(ms[0], 3),
+        "median": round(statistics.median(ms), 3),
+        "p95": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "max": round(ms[-1], 3)
+    }
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _summary(samples)
+
+
+# ============ BENCHMARKS ============
+def _cli_env(cache_dir):
+    """Environment for a benchmarked search.py process: private cache dir, no server forwarding"""
+    env = dict(os.environ, UI_PRO_MAX_CACHE_DIR=cache_dir)
+    env.pop("UI_PRO_MAX_SERVER", None)
+    env.pop("UI_PRO_MAX_NO_CACHE", None)
+    return env
+
+
+def bench_cli(repeat):
+    """Wall-clock time of separate search.py processes.
+
+    cold and warm run with --no-cache, so they time index loading and search;
+    result_cached repeats one query with the result cache on, so every timed
+    run is a cache hit.
+    """
+    commands = {
+        "domain": ["glassmorphism", "--domain", "style"],
+        "stack": [STACK_QUERY, "--stack", "html-tailwind"],
+        "design_system": ["saas dashboard", "--design-system"]
+    }
+    results = {}
+    for name, args in commands.items():
+        for mode in ("cold", "warm", "result_cached"):
+            command = [sys.executable, str(SCRIPT_DIR / "search.py")] + args
+            if mode != "result_cached":
+                command.append("--no-cache")
+            with tempfile.TemporaryDirectory() as cache_dir:
+                env = _cli_env(cache_dir)
+                samples = []
+                for i in range(repeat):
+                    if mode == "cold":
+                        for f in Path(cache_dir).glob("*"):
+                            f.unlink()
+                    elif i == 0:
+                        # Prime the on-disk caches without timing it
+                        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+                    start = time.perf_counter()
+                    subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+                    samples.append(time.perf_counter() - start)
+            results[f"{name}_{mode}"] = _summary(samples)
+    return results
+
+
+def bench_warm(repeat):
+    """In-process latency of one query per domain and per stack with indexes loaded"""
+    core.preload()
+    domains = {domain: _time(lambda d=domain: core.search(DOMAIN_QUERIES[d], d), repeat) for domain in CSV_CONFIG}
+    stacks = {stack: _time(lambda s=stack: core.search_stack(STACK_QUERY, s), repeat) for stack in AVAILABLE_STACKS}
+    search_all = _time(lambda: core.search_all(DOMAIN_QUERIES["product"]), repeat)
+    return {"domains": domains, "stacks": stacks, "search_all": search_all}
+
+
+def bench_design(repeat):
+    """generate_design_system latency, without and with persistence"""
+    results = {}
+    for persist in (False, True):
+        samples = []
+        with tempfile.TemporaryDirectory() as out_dir:
+            for i in range(repeat):
+                query = DESIGN_QUERIES[i % len(DESIGN_QUERIES)]
+                design_system.clear_cache()
+                start = time.perf_counter()
+                design_system.generate_design_system(query, "Bench", persist=persist,
+                                                     page="dashboard" if persist else None, output_dir=out_dir)
+                samples.append(time.perf_counter() - start)
+        results["persist" if persist else "generate"] = _summary(samples)
+    return results
+
+
+def bench_memory():
+    """Peak Python allocations while loading every index and querying each dataset"""
+    core._INDEXES.clear()
+    tracemalloc.start()
+    core.preload()
+    loaded = tracemalloc.get_traced_memory()[0]
+    for domain in CSV_CONFIG:
+        core.search(DOMAIN_QUERIES[domain], domain)
+    for stack in AVAILABLE_STACKS:
+        core.search_stack(STACK_QUERY, stack)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {"indexes_kb": round(loaded / 1024, 1), "peak_kb": round(peak / 1024, 1)}
+    try:
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        result["max_rss_kb"] = maxrss // 1024 if sys.platform == "darwin" else maxrss
+    except ImportError:
+        pass
+    return result
+
+
+def bench_scaling(scales, repeat):
+    """Fit time, query latency and memory for corpora repeating the shipped rows `scale` times"""
+    datasets = {
+        "style": (DATA_DIR / CSV_CONFIG["style"]["file"], CSV_CONFIG["style"]["search_cols"], DOMAIN_QUERIES["style"]),
+        "ux": (DATA_DIR / CSV_CONFIG["ux"]["file"], CSV_CONFIG["ux"]["search_cols"], DOMAIN_QUERIES["ux"]),
+        "stack": (DATA_DIR / STACK_CONFIG["react"]["file"], _STACK_COLS["search_cols"], STACK_QUERY)
+    }
+    results = {}
+    for name, (filepath, search_cols, query) in datasets.items():
+        documents = core._documents(core._load_csv(filepath), search_cols)
+        results[name] = {}
+        for scale in scales:
+            corpus = documents * scale
+            tracemalloc.start()
+            bm25 = BM25()
+            start = time.perf_counter()
+            bm25.fit(corpus)
+            fit_time = time.perf_counter() - start
+            index_kb = tracemalloc.get_traced_memory()[0] / 1024
+            tracemalloc.stop()
+            entry = {
+                "docs": len(corpus),
+                "fit_ms": round(fit_time * 1000, 3),
+                "index_kb": round(index_kb, 1),
+                "top_k": _time(lambda: bm25.top_k(query, core.MAX_RESULTS), repeat),
+                "score": _time(lambda: bm25.score(query), repeat)
+            }
+            if core._import_numpy():
+                matrix = core.SparseBM25Matrix(bm25)
+                queries = [query] * 100
+                entry["numpy_batch_100"] = _time(lambda: matrix.top_k_many(queries, core.MAX_RESULTS), max(1, repeat // 5))
+            results[name][str(scale)] = entry
+    return results
+
+
+def _import_time_ms(env):
+    """Total of the top-level cumulative times reported by python -X importtime"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(SCRIPT_DIR / "search.py"), "--help"],
+                          env=env, capture_output=True, text=True, check=True)
+    total = 0
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[1].strip().isdigit():
+            if not parts[2].startswith("  "):  # Nested imports are already in their parent's cumulative time
+                total += int(parts[1])
+    return total / 1000
+
+
+def bench_startup(repeat):
+    """Import time of the CLI and wall-clock time of a plain domain query, as separate processes.
+
+    The query runs with --no-cache (a result-cache hit would skip the search)
+    against a private cache dir whose index cache is warmed first.
+    """
+    command = [sys.executable, str(SCRIPT_DIR / "search.py"), "glassmorphism", "--domain", "style", "--no-cache"]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = _cli_env(cache_dir)
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)  # Warm the index cache and bytecode
+        imports = [_import_time_ms(env) for _ in range(repeat)]
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+            samples.append(time.perf_counter() - start)
+    return {"import_ms": round(statistics.median(imports), 3), "query": _summary(samples)}
+
+
+def check_startup(result, import_budget_ms, query_budget_ms):
+    """Over-budget messages for a bench_startup() result (empty when within budget)"""
+    failures = []
+    if result["import_ms"] > import_budget_ms:
+        failures.append(f"import time {result['import_ms']:.1f} ms exceeds budget of {import_budget_ms} ms")
+    if result["query"]["median"] > query_budget_ms:
+        failures.append(f"query time {result['query']['median']:.1f} ms exceeds budget of {query_budget_ms} ms")
+    return failures
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "numpy": bool(core._import_numpy())
+    }
+
+
+def compare(before, after, path=""):
+    """Lines describing how each median/ms figure moved between two result files"""
+    lines = []
+    for key, value in after.items():
+        old = before.get(key) if isinstance(before, dict) else None
+        name = f"{path}.{key}" if path else key
+        if isinstance(value, dict) and isinstance(old, dict):
+            if "median" in value and "median" in old:
+                ratio = value["median"] / old["median"] if old["median"] else float("inf")
+                lines.append(f"{name}: {old['median']:.3f} -> {value['median']:.3f} ms ({ratio:.2f}x)")
+            else:
+                lines.extend(compare(old, value, name))
+        elif key.endswith(("_ms", "_kb")) and isinstance(old, (int, float)) and isinstance(value, (int, float)):
+            ratio = value / old if old else float("inf")
+            lines.append(f"{name}: {old} -> {value} ({ratio:.2f}x)")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max Benchmark")
+    parser.add_argument("--repeat", "-r", type=int, default=20, help="Runs per measurement (default: 20)")
+    parser.add_argument("--cli-repeat", type=int, default=5, help="Process launches per CLI measurement (default: 5)")
+    parser.add_argument("--scales", type=int, nargs="*", default=[10, 100, 1000], help="Synthetic corpus multipliers (default: 10 100 1000)")
+    parser.add_argument("--skip", nargs="*", default=[], choices=["cli", "warm", "design", "memory", "scaling", "startup"], help="Sections to skip")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    parser.add_argument("--check-startup", action="store_true", help="Only measure startup; exit 1 if over budget")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS, help=f"Startup import budget (default: {IMPORT_BUDGET_MS})")
+    parser.add_argument("--query-budget-ms", type=float, default=QUERY_BUDGET_MS, help=f"Single-query process budget (default: {QUERY_BUDGET_MS})")
+    args = parser.parse_args()
+
+    if args.check_startup:
+        result = bench_startup(args.cli_repeat)
+        print(json.dumps(result, indent=2))
+        failures = check_startup(result, args.import_budget_ms, args.query_budget_ms)
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+    if args.compare:
+        with open(args.compare[0], 'r', encoding='utf-8') as f:
+            before = json.load(f)
+        with open(args.compare[1], 'r', encoding='utf-8') as f:
+            after = json.load(f)
+        print("\n".join(compare(before.get("results", {}), after.get("results", {}))))
+        sys.exit(0)
+
+    sections = {
+        "cli": lambda: bench_cli(args.cli_repeat),
+        "warm": lambda: bench_warm(args.repeat),
+        "design": lambda: bench_design(args.repeat),
+        "memory": bench_memory,
+        "scaling": lambda: bench_scaling(args.scales, args.repeat),
+        "startup": lambda: bench_startup(args.cli_repeat)
+    }
+    results = {}
+    for name, run in sections.items():
+        if name not in args.skip:
+            print(f"Running {name}...", file=sys.stderr)
+            results[name] = run()
+
+    report = json.dumps({"meta": _metadata(), "results": results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+    else:
+        print(report)
@@ -2,18 +2,62 @@
 # -*- coding: utf-8 -*-
 """
 UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
+
+csv, pickle and tempfile are imported where they are first needed: a query served
+from a prebuilt binary index never touches them.
 """
 
-import csv
-import re
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
 from pathlib import Path
 from math import log
 from collections import defaultdict
+from collections.abc import Sequence
+
+from timings import span
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
 MAX_RESULTS = 3
 
+# Fitted indexes are cached on disk next to DATA_DIR (override with UI_PRO_MAX_CACHE_DIR)
+CACHE_DIR = Path(os.environ.get("UI_PRO_MAX_CACHE_DIR") or Path(__file__).parent.parent / ".cache")
+INDEX_CACHE_VERSION = 6  # Bump when the BM25 layout, tokenizer or stored rows change
+
+# Typo/prefix tolerance: a query token missing from an index is replaced by the closest vocabulary
+# terms within this many edits, else by terms it is a prefix of (0 disables; set_fuzzy() or --fuzzy)
+FUZZY_DISTANCE = int(os.environ.get("UI_PRO_MAX_FUZZY") or 0)
+FUZZY_EXPANSIONS = 3  # Most vocabulary terms one query token expands to
+
+# Extra data directories merged into the bundled datasets (os.pathsep-separated, or search.py --data-dir).
+# Each mirrors data/: <dir>/styles.csv and/or <dir>/styles/*.csv, <dir>/stacks/react.csv and/or <dir>/stacks/react/*.csv
+DATA_DIRS = [Path(p) for p in os.environ.get("UI_PRO_MAX_DATA_DIRS", "").split(os.pathsep) if p]
+PARSE_WORKERS = os.cpu_count() or 1  # Processes parsing and tokenizing extension CSVs
+PARALLEL_PARSE_MIN_FILES = 4  # Fewer files than this are parsed in-process
+
+# Precompiled binary indexes shipped with the data (built by `core.py --build-index`)
+INDEX_DIR = DATA_DIR / "index"
+
+# Scoring engine: "python" (pure-Python BM25.top_k), "numpy" (sparse matrix, batch-friendly)
+# or "sqlite" (FTS5 tables in FTS_DATABASE, ranked by SQLite's bm25())
+ENGINES = ("python", "numpy", "sqlite")
+DEFAULT_ENGINE = os.environ.get("UI_PRO_MAX_ENGINE", "python")
+FTS_DATABASE = Path(os.environ.get("UI_PRO_MAX_FTS_DB") or CACHE_DIR / "fts.sqlite")
+FTS_SCHEMA_VERSION = 1  # Bump when the FTS table layout changes
+
+# Persistent result cache shared by CLI processes (off until set_result_cache(True); see result_cache.py)
+RESULT_CACHE_FILE = CACHE_DIR / "results.sqlite"
+RESULT_CACHE_SIZE = 2048  # Entries kept; least recently used are evicted first
+RESULT_CACHE_SCHEMA = 1  # Bump when the cached result shape changes
+
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
@@ -91,137 +135,1407 @@ _STACK_COLS = {
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
+# Substrings that vote for a domain in detect_domain (ties go to the earlier domain)
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+
 
 # ============ BM25 IMPLEMENTATION ============
+class _PunctuationTable(dict):
+    """str.translate table mapping every non-word, non-space character to a space.
+
+    Equivalent to re.sub(r'[^\\w\\s]', ' ', text) (\\w is str.isalnum() plus "_");
+    each character is classified once and remembered.
+    """
+
+    def __missing__(self, codepoint):
+        ch = chr(codepoint)
+        value = ch if (ch.isspace() or ch.isalnum() or ch == "_") else " "
+        self[codepoint] = value
+        return value
+
+
+_PUNCTUATION = _PunctuationTable()
+
+
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25 ranking algorithm for text search.
+
+    Tokens are interned as integer ids through the index's vocabulary; documents,
+    postings and per-term/per-document statistics are stored in typed arrays.
+
+    add_tokens()/remove_document() edit a fitted index in place. The first edit
+    makes the index "live": idf, doc_norms and term_bounds turn into views computed
+    from doc_freqs, N and avgdl on access, so an edit only touches the postings of
+    the edited document's terms. Removed ids stay unused (corpus entry None).
+    """
+
+    live = False
+    version = 0  # Bumped on every edit
 
     def __init__(self, k1=1.5, b=0.75):
         self.k1 = k1
         self.b = b
-        self.corpus = []
-        self.doc_lengths = []
+        self.vocab = {}                    # term -> term id
+        self.terms = []                    # term id -> term
+        self.corpus = []                   # array('I') of term ids per document
+        self.doc_lengths = array('I')
         self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
+        self.idf = array('d')              # by term id
+        self.doc_freqs = array('I')        # by term id
         self.N = 0
+        self.postings = []                 # term id -> (array('I') doc ids, array('I') term freqs)
+        self.doc_norms = array('d')        # k1 * (1 - b + b * dl / avgdl) per document
+        self.term_bounds = array('d')      # highest score contribution of each term (for top_k pruning)
 
-    def tokenize(self, text):
+    @staticmethod
+    def tokenize(text):
         """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
+        text = str(text).lower().translate(_PUNCTUATION)
         return [w for w in text.split() if len(w) > 2]
 
+    def query_ids(self, query):
+        """Term ids of the query's tokens that occur in the index (duplicates kept)"""
+        vocab = self.vocab
+        if not FUZZY_DISTANCE:
+            return [vocab[w] for w in self.tokenize(query) if w in vocab]
+        ids = []
+        for w in self.tokenize(query):
+            term_id = vocab.get(w)
+            if term_id is not None:
+                ids.append(term_id)
+            else:
+                ids.extend(self.fuzzy_ids(w))
+        return ids
+
+    def fuzzy_ids(self, token):
+        """Term ids standing in for a token that is not in the vocabulary (see FUZZY_DISTANCE)"""
+        index = getattr(self, "_trigram_index", None)
+        if index is None:
+            index = self._trigram_index = TrigramIndex(self.terms, self.doc_freqs)
+        return index.expand(token, FUZZY_DISTANCE)
+
     def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
+        """Build BM25 inverted index from documents"""
+        self.fit_tokens(self.tokenize(doc) for doc in documents)
+
+    def fit_tokens(self, token_lists):
+        """fit() from documents already split by tokenize()"""
+        vocab, terms = {}, []
+        corpus = []
+        for tokens in token_lists:
+            ids = array('I')
+            for word in tokens:
+                term_id = vocab.get(word)
+                if term_id is None:
+                    term_id = vocab[word] = len(terms)
+                    terms.append(word)
+                ids.append(term_id)
+            corpus.append(ids)
+        self.vocab, self.terms, self.corpus = vocab, terms, corpus
+        self.N = len(corpus)
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
+        self.doc_lengths = array('I', (len(doc) for doc in corpus))
         self.avgdl = sum(self.doc_lengths) / self.N
+        self.doc_norms = array('d', (self.k1 * (1 - self.b + self.b * doc_len / self.avgdl) for doc_len in self.doc_lengths))
+
+        self.postings = [(array('I'), array('I')) for _ in terms]
+        for idx, doc in enumerate(corpus):
+            term_freqs = {}
+            for term_id in doc:
+                term_freqs[term_id] = term_freqs.get(term_id, 0) + 1
+            for term_id, tf in term_freqs.items():
+                docs, tfs = self.postings[term_id]
+                docs.append(idx)
+                tfs.append(tf)
+
+        self.doc_freqs = array('I', (len(docs) for docs, _ in self.postings))
+        self.idf = array('d', (log((self.N - freq + 0.5) / (freq + 0.5) + 1) for freq in self.doc_freqs))
+
+        k1_plus_1 = self.k1 + 1
+        doc_norms = self.doc_norms
+        self.term_bounds = array('d', (
+            max(idf * (tf * k1_plus_1) / (tf + doc_norms[idx]) for idx, tf in zip(docs, tfs))
+            for idf, (docs, tfs) in zip(self.idf, self.postings)))
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+    def _make_live(self):
+        """Switch to per-edit statistics (see class docstring); one pass over the postings"""
+        if self.live:
+            return
+        if self.corpus is None:
+            raise ValueError("Memory-mapped indexes are read-only; refit from the rows to edit them")
+        doc_lengths = self.doc_lengths
+        self.total_length = sum(doc_lengths)
+        # Per-term largest tf and shortest document bound each term's contribution from above
+        self.max_tf = array('I', (max(tfs, default=0) for _, tfs in self.postings))
+        self.min_dl = array('I', (min((doc_lengths[idx] for idx in docs), default=0) for docs, _ in self.postings))
+        self.idf = _LiveIdf(self)
+        self.doc_norms = _LiveNorms(self)
+        self.term_bounds = _LiveBounds(self)
+        self.live = True
+
+    def add_document(self, text):
+        """Index one more document; returns its id"""
+        return self.add_tokens(self.tokenize(text))
+
+    def add_tokens(self, tokens):
+        """add_document() for text already split by tokenize()"""
+        self._make_live()
+        vocab, terms = self.vocab, self.terms
+        ids = array('I')
+        for word in tokens:
+            term_id = vocab.get(word)
+            if term_id is None:
+                term_id = vocab[word] = len(terms)
+                terms.append(word)
+                self.postings.append((array('I'), array('I')))
+                self.doc_freqs.append(0)
+                self.max_tf.append(0)
+                self.min_dl.append(0)
+                trigram_index = getattr(self, "_trigram_index", None)
+                if trigram_index is not None:
+                    trigram_index.add(term_id, word)
+            ids.append(term_id)
 
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+        # Document-level entries first, so concurrent readers never meet an unknown id
+        idx = len(self.doc_lengths)
+        doc_len = len(ids)
+        self.corpus.append(ids)
+        self.doc_lengths.append(doc_len)
+        term_freqs = {}
+        for term_id in ids:
+            term_freqs[term_id] = term_freqs.get(term_id, 0) + 1
+        for term_id, tf in term_freqs.items():
+            docs, tfs = self.postings[term_id]
+            docs.append(idx)
+            tfs.append(tf)
+            self.max_tf[term_id] = max(self.max_tf[term_id], tf)
+            self.min_dl[term_id] = min(self.min_dl[term_id], doc_len) if self.doc_freqs[term_id] else doc_len
+            self.doc_freqs[term_id] += 1
+
+        self.N += 1
+        self.total_length += doc_len
+        self.avgdl = self.total_length / self.N
+        self.version += 1
+        return idx
+
+    def remove_document(self, idx):
+        """Take a document out of the postings and statistics"""
+        self._make_live()
+        doc = self.corpus[idx]
+        if doc is None:
+            return
+        for term_id in dict.fromkeys(doc):
+            docs, tfs = self.postings[term_id]
+            pos = bisect_left(docs, idx)
+            del docs[pos]
+            del tfs[pos]
+            self.doc_freqs[term_id] -= 1
+            # max_tf/min_dl are left as they are: still valid (if looser) bounds
+        self.corpus[idx] = None
+        self.N -= 1
+        self.total_length -= self.doc_lengths[idx]
+        self.avgdl = self.total_length / self.N if self.N else 0
+        self.version += 1
 
     def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+        """Score documents containing a query term, best first as (idx, score)"""
+        scores = defaultdict(float)
+        k1_plus_1 = self.k1 + 1
+        doc_norms = self.doc_norms
+
+        for term_id in self.query_ids(query):
+            idf = self.idf[term_id]
+            docs, tfs = self.postings[term_id]
+            for idx, tf in zip(docs, tfs):
+                scores[idx] += idf * (tf * k1_plus_1) / (tf + doc_norms[idx])
+
+        return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+
+    def top_k(self, query, k):
+        """Best k documents as (idx, score), skipping documents that cannot make the cut.
+
+        Query terms are visited in order of decreasing upper bound (MaxScore). Once
+        the k-th best partial score beats everything the remaining terms could still
+        add, documents not seen yet are no longer admitted as candidates.
+        """
+        if k <= 0:
+            return []
+        term_bounds = self.term_bounds
+        terms = sorted(self.query_ids(query), key=lambda t: term_bounds[t], reverse=True)
+
+        scores = {}
+        k1_plus_1 = self.k1 + 1
+        doc_norms = self.doc_norms
+        remaining = sum(term_bounds[t] for t in terms)
+
+        for term_id in terms:
+            idf = self.idf[term_id]
+            bound = term_bounds[term_id]
+            remaining -= bound
+            admit_new = True
+            if len(scores) >= k:
+                threshold = heapq.nlargest(k, scores.values())[-1]
+                # Small slack keeps float rounding in the bound sums from pruning an exact tie
+                admit_new = bound + remaining >= threshold * (1 - 1e-9)
+            docs, tfs = self.postings[term_id]
+            for idx, tf in zip(docs, tfs):
+                contribution = idf * (tf * k1_plus_1) / (tf + doc_norms[idx])
+                if idx in scores:
+                    scores[idx] += contribution
+                elif admit_new:
+                    scores[idx] = contribution
+
+        return heapq.nsmallest(k, scores.items(), key=lambda x: (-x[1], x[0]))
+
+
+class _LiveIdf:
+    """idf by term id, from the current document frequencies"""
+    __slots__ = ("bm25",)
+
+    def __init__(self, bm25):
+        self.bm25 = bm25
+
+    def __getitem__(self, term_id):
+        bm25 = self.bm25
+        freq = bm25.doc_freqs[term_id]
+        return log((bm25.N - freq + 0.5) / (freq + 0.5) + 1)
+
+
+class _LiveNorms:
+    """k1 * (1 - b + b * dl / avgdl) by document id, from the current average length"""
+    __slots__ = ("bm25",)
+
+    def __init__(self, bm25):
+        self.bm25 = bm25
+
+    def __getitem__(self, idx):
+        bm25 = self.bm25
+        return bm25.k1 * (1 - bm25.b + bm25.b * bm25.doc_lengths[idx] / bm25.avgdl)
+
+
+class _LiveBounds:
+    """Upper bound of each term's contribution: its largest tf in its shortest document"""
+    __slots__ = ("bm25",)
+
+    def __init__(self, bm25):
+        self.bm25 = bm25
+
+    def __getitem__(self, term_id):
+        bm25 = self.bm25
+        tf = bm25.max_tf[term_id]
+        if not tf or not bm25.N:
+            return 0.0
+        norm = bm25.k1 * (1 - bm25.b + bm25.b * bm25.min_dl[term_id] / bm25.avgdl)
+        return bm25.idf[term_id] * (tf * (bm25.k1 + 1)) / (tf + norm)
+
+
+# ============ FUZZY MATCHING ============
+def set_fuzzy(max_distance):
+    """Edit-distance cap for expanding unknown query tokens (0 turns expansion off)"""
+    global FUZZY_DISTANCE
+    FUZZY_DISTANCE = max(0, int(max_distance))
+
+
+def _trigrams(word):
+    """Distinct character trigrams of a word padded with two leading and one trailing space"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b, cap):
+    """Optimal-string-alignment distance (adjacent swaps count once), or cap + 1 if above cap"""
+    if abs(len(a) - len(b)) > cap:
+        return cap + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = ca != cb
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current) > cap:
+            return cap + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= cap else cap + 1
+
+
+class TrigramIndex:
+    """Character-trigram index over a fitted vocabulary.
+
+    An edit touches at most four trigrams (a swap of adjacent letters, which the
+    edit distance counts as one edit, changes every trigram over either letter),
+    so a term within d edits of a token shares at least len(trigrams(token)) - 4d
+    of them; only terms passing that filter are checked with the (bounded) edit
+    distance.
+    """
+
+    def __init__(self, terms, doc_freqs):
+        self.terms = terms
+        self.doc_freqs = doc_freqs
+        postings = defaultdict(list)
+        for term_id, term in enumerate(terms):
+            for gram in _trigrams(term):
+                postings[gram].append(term_id)
+        self.postings = {gram: array('I', ids) for gram, ids in postings.items()}
+        self._memo = {}
+
+    def add(self, term_id, term):
+        """Index a term appended to the vocabulary"""
+        for gram in _trigrams(term):
+            self.postings.setdefault(gram, array('I')).append(term_id)
+        self._memo.clear()
+
+    def expand(self, token, max_distance, limit=FUZZY_EXPANSIONS):
+        """Ids of the closest terms within max_distance edits (fewer for short tokens),
+        else of terms starting with the token; most frequent first, at most limit"""
+        key = (token, max_distance, limit)
+        if key in self._memo:
+            return self._memo[key]
+
+        grams = _trigrams(token)
+        shared = defaultdict(int)
+        for gram in grams:
+            for term_id in self.postings.get(gram, ()):
+                shared[term_id] += 1
+
+        cap = min(max_distance, max(1, len(token) // 4))
+        best, matches, prefixes = cap + 1, [], []
+        for term_id, count in shared.items():
+            if not self.doc_freqs[term_id]:  # Every document using it was removed
+                continue
+            term = self.terms[term_id]
+            if count >= len(grams) - 4 * cap:
+                distance = _edit_distance(token, term, cap)
+                if distance < best:
+                    best, matches = distance, [term_id]
+                elif distance == best and distance <= cap:
+                    matches.append(term_id)
+            # A prefix keeps every trigram but the one with the trailing space
+            if count >= len(grams) - 1 and len(token) >= 4 and term.startswith(token):
+                prefixes.append(term_id)
+
+        ids = sorted(matches or prefixes, key=lambda t: (-self.doc_freqs[t], self.terms[t]))[:limit]
+        if len(self._memo) >= 4096:
+            self._memo.clear()
+        self._memo[key] = ids
+        return ids
+
+
+# ============ NUMPY ENGINE ============
+_numpy = None
+
+
+def _import_numpy():
+    """NumPy module, or None if it is not installed"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+class SparseBM25Matrix:
+    """Fitted BM25 as a sparse term-document matrix of precomputed BM25 weights (needs NumPy).
+
+    Row t holds idf(t) * tf * (k1 + 1) / (tf + norm(d)) for every document d
+    containing t, so scoring a batch of queries is one sparse product followed
+    by a partial sort per query.
+    """
+
+    # Upper bound on dense score cells per chunk of queries (~32 MB of float64)
+    MAX_CELLS = 4_000_000
+
+    def __init__(self, bm25):
+        np = _import_numpy()
+        self.bm25 = bm25
+        self.N = bm25.N
+        indptr = [0]
+        indices, data = [], []
+        k1_plus_1 = bm25.k1 + 1
+        doc_norms = np.asarray(bm25.doc_norms, dtype=np.float64)
+        for idf, (docs, tfs) in zip(bm25.idf, bm25.postings):
+            docs = np.asarray(docs, dtype=np.int64)
+            tfs = np.asarray(tfs, dtype=np.float64)
+            indices.append(docs)
+            data.append(idf * (tfs * k1_plus_1) / (tfs + doc_norms[docs]))
+            indptr.append(indptr[-1] + len(docs))
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+        self.data = np.concatenate(data) if data else np.zeros(0, dtype=np.float64)
+
+    def top_k_many(self, queries, k):
+        """BM25.top_k for each query, computed a chunk of queries at a time"""
+        np = _import_numpy()
+        if k <= 0 or self.N == 0:
+            return [[] for _ in queries]
+        chunk_size = max(1, self.MAX_CELLS // self.N)
+        results = []
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            # Gather each query's matrix rows, offsetting doc ids by query position
+            cells, weights = [], []
+            for qi, query in enumerate(chunk):
+                for term_id in self.bm25.query_ids(query):
+                    lo, hi = self.indptr[term_id], self.indptr[term_id + 1]
+                    cells.append(self.indices[lo:hi] + qi * self.N)
+                    weights.append(self.data[lo:hi])
+            if cells:
+                scores = np.bincount(np.concatenate(cells), np.concatenate(weights), minlength=len(chunk) * self.N)
+            else:
+                scores = np.zeros(len(chunk) * self.N)
+            for row in scores.reshape(len(chunk), self.N):
+                results.append(self._select(np, row, k))
+        return results
+
+    def _select(self, np, row, k):
+        """Top k positive scores of one row as [(idx, score)], ties broken by doc order"""
+        if k < self.N:
+            kth = row[np.argpartition(-row, k - 1)[k - 1]]
+            candidates = np.nonzero(row >= max(kth, np.nextafter(0, 1)))[0]
+        else:
+            candidates = np.nonzero(row > 0)[0]
+        order = np.lexsort((candidates, -row[candidates]))[:k]
+        return [(int(candidates[i]), float(row[candidates[i]])) for i in order]
+
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+# ============ SQLITE ENGINE ============
+_fts_supported = None
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
 
-            scores.append((idx, score))
+def _fts_available():
+    """True if the sqlite3 module is present and its SQLite was built with FTS5"""
+    global _fts_supported
+    if _fts_supported is None:
+        try:
+            import sqlite3
+            sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+            _fts_supported = True
+        except Exception:  # ImportError, or sqlite3.OperationalError without FTS5
+            _fts_supported = False
+    return _fts_supported
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+
+class FTSIndex:
+    """Every dataset as an FTS5 table in one SQLite database, ranked with FTS5's bm25().
+
+    Documents and queries are stored/matched as BM25.tokenize() output, so both
+    engines see the same terms; bm25() uses its own constants (k1=1.2, b=0.75),
+    so near-equal scores can order differently than with the python engine.
+    Rows are kept in the database too: queries never load a CSV into memory.
+    Tables are (re)built on first use when their CSV changed (see `--build-fts`).
+    """
+
+    TOKENIZER = "unicode61 remove_diacritics 0 tokenchars '_'"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()  # One connection, shared by the design-system threads
+        self._tables = {}  # (path, search_cols) -> (stat, table name, fieldnames) verified by this process
+
+    def _connect(self):
+        import sqlite3
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS sources (name TEXT PRIMARY KEY, version INTEGER, "
+                         "mtime_ns INTEGER, size INTEGER, sha1 TEXT, fieldnames TEXT)")
+            self._conn, self._pid = conn, os.getpid()
+            self._tables = {}
+        return self._conn
+
+    def table(self, filepath, search_cols):
+        """(table name, fieldnames) of the up-to-date FTS table for a CSV, building it if needed"""
+        conn = self._connect()
+        key = (str(filepath), tuple(search_cols))
+        files = _dataset_files(filepath)
+        stat = _dataset_stat(files)
+        known = self._tables.get(key)
+        if known and known[0] == stat:
+            return known[1], known[2]
+
+        sources = tuple(str(f.resolve()) for f in files)
+        name = "fts_" + hashlib.sha1("|".join(sources + key[1]).encode('utf-8')).hexdigest()[:16]
+        conn.execute("BEGIN IMMEDIATE")  # Serialises builds between processes
+        try:
+            row = conn.execute("SELECT version, mtime_ns, size, sha1, fieldnames FROM sources WHERE name = ?", (name,)).fetchone()
+            if row and row[0] == FTS_SCHEMA_VERSION and (row[1], row[2]) == stat:
+                fieldnames = json.loads(row[4])
+            elif row and row[0] == FTS_SCHEMA_VERSION and row[3] == _content_hash(*files):
+                conn.execute("UPDATE sources SET mtime_ns = ?, size = ? WHERE name = ?", stat + (name,))
+                fieldnames = json.loads(row[4])
+            else:
+                fieldnames = self._build(conn, name, files, search_cols, stat)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._tables[key] = (stat, name, fieldnames)
+        return name, fieldnames
+
+    def _build(self, conn, name, files, search_cols, stat):
+        data, tokens = _load_dataset(files, search_cols)
+        with span("fts.build", file=files[0].name, docs=len(data)):
+            conn.execute(f"DROP TABLE IF EXISTS {name}")
+            conn.execute(f"CREATE VIRTUAL TABLE {name} USING fts5(doc, row UNINDEXED, tokenize=\"{self.TOKENIZER}\")")
+            conn.executemany(f"INSERT INTO {name} (rowid, doc, row) VALUES (?, ?, ?)",
+                             ((idx, " ".join(doc_tokens), json.dumps(list(data._values(idx)), ensure_ascii=False))
+                              for idx, doc_tokens in enumerate(tokens)))
+            conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+                         (name, FTS_SCHEMA_VERSION) + stat + (_content_hash(*files), json.dumps(data.fieldnames)))
+        return data.fieldnames
+
+    def search_many(self, filepath, search_cols, output_cols, queries, k):
+        """Output columns of the best k rows for each query; None if the database is unusable"""
+        import sqlite3
+        try:
+            with self._lock:
+                return self._search_many(filepath, search_cols, output_cols, queries, k)
+        except (sqlite3.Error, OSError):
+            return None
+
+    def _search_many(self, filepath, search_cols, output_cols, queries, k):
+        name, fieldnames = self.table(filepath, search_cols)
+        conn = self._conn
+        batch = []
+        for query in queries:
+            tokens = BM25.tokenize(query)
+            if not tokens or k <= 0:
+                batch.append([])
+                continue
+            match = " OR ".join('"' + token.replace('"', '""') + '"' for token in tokens)
+            hits = conn.execute(f"SELECT row FROM {name} WHERE {name} MATCH ? ORDER BY bm25({name}), rowid LIMIT ?",
+                                (match, k)).fetchall()
+            rows = _RowTable(fieldnames, [tuple(json.loads(row)) for row, in hits])
+            batch.append([rows.select(idx, output_cols) for idx in range(len(rows))])
+        return batch
+
+
+_FTS = None
+
+
+def _fts_index():
+    global _FTS
+    if _FTS is None or _FTS.path != FTS_DATABASE:
+        _FTS = FTSIndex(FTS_DATABASE)
+    return _FTS
+
+
+def build_fts_database():
+    """Create or refresh the FTS table of every dataset; returns the database path"""
+    index = _fts_index()
+    with index._lock:
+        for filepath, search_cols in _datasets():
+            if filepath.exists():
+                index.table(filepath, search_cols)
+    return index.path
+
+
+# ============ UNIFIED INDEX ============
+class UnifiedIndex:
+    """Several datasets' BM25 indexes behind one vocabulary.
+
+    A query is tokenized once and each token looked up once; the hit lists
+    for all datasets containing it are then scored in the same pass, keeping
+    each dataset's own IDF and length normalisation so per-dataset rankings
+    match a search of that dataset alone. Datasets are added as they are
+    first requested (see _unified_index()).
+    """
+
+    def __init__(self, parts=()):
+        """parts: [(tag, (rows, bm25))]; a part may be None if its file is missing"""
+        self.tags = []
+        self.rows = []
+        self.indexes = []
+        self._slots = {}
+        self._term_counts = []  # Per slot: terms of its BM25 already in vocab
+        self.vocab = {}  # term -> [(slot, term id in that dataset)]
+        for tag, part in parts:
+            self.add(tag, part)
+
+    def add(self, tag, part):
+        """Append a dataset ((rows, bm25), or None if its file is missing); returns its slot"""
+        slot = len(self.tags)
+        self.rows.append(part[0] if part else None)
+        self.indexes.append(part[1] if part else None)
+        self._term_counts.append(0)
+        self.tags.append(tag)
+        if part:
+            self.sync(slot)
+            self._slots[tag] = slot
+        return slot
+
+    def sync(self, slot):
+        """Add the terms a slot's BM25 gained since it was last synced (see BM25.add_tokens)"""
+        terms = self.indexes[slot].terms
+        vocab = self.vocab
+        end = len(terms)
+        for term_id in range(self._term_counts[slot], end):
+            entries = vocab.get(terms[term_id])
+            if entries is None:
+                vocab[terms[term_id]] = [(slot, term_id)]
+            else:
+                entries.append((slot, term_id))
+        self._term_counts[slot] = end
+
+    def part(self, tag):
+        """(slot, bm25) of an added dataset (bm25 None if its file is missing), else None"""
+        if tag not in self.tags:
+            return None
+        slot = self.tags.index(tag)
+        return slot, self.indexes[slot]
+
+    def slot(self, tag):
+        """Slot number of a dataset tag, or None if that dataset is unavailable"""
+        return self._slots.get(tag)
+
+    def top_k(self, query, k_per_slot):
+        """{slot: [(idx, score)]} best k documents of each requested slot"""
+        if not k_per_slot:
+            return {}
+        tokens = BM25.tokenize(query)
+        scores = {slot: defaultdict(float) for slot in k_per_slot}
+        for token in tokens:
+            hits = self.vocab.get(token, ())
+            if FUZZY_DISTANCE:
+                # Expand per dataset, as a search of that dataset alone would
+                present = {slot for slot, _ in hits}
+                hits = list(hits) + [(slot, term_id) for slot in scores if slot not in present
+                                     for term_id in self.indexes[slot].fuzzy_ids(token)]
+            for slot, term_id in hits:
+                acc = scores.get(slot)
+                if acc is None:
+                    continue
+                bm25 = self.indexes[slot]
+                idf = bm25.idf[term_id]
+                k1_plus_1 = bm25.k1 + 1
+                doc_norms = bm25.doc_norms
+                docs, tfs = bm25.postings[term_id]
+                for idx, tf in zip(docs, tfs):
+                    acc[idx] += idf * (tf * k1_plus_1) / (tf + doc_norms[idx])
+        return {slot: heapq.nsmallest(k, scores[slot].items(), key=lambda x: (-x[1], x[0])) if k > 0 else []
+                for slot, k in k_per_slot.items()}
+
+
+_UNIFIED = None  # UnifiedIndex over the datasets requested so far
+_UNIFIED_LOCK = threading.Lock()
+
+
+def _unified_index(tags=None):
+    """UnifiedIndex covering the given dataset tags (default: every dataset).
+
+    Only requested datasets are loaded; they are added to the shared index on
+    first use. Terms added by edits are merged into its vocabulary; a reloaded
+    component starts a new index.
+    """
+    global _UNIFIED
+    datasets = {tag: (filepath, search_cols) for tag, filepath, search_cols in _tagged_datasets()}
+    tags = list(datasets) if tags is None else [tag for tag in dict.fromkeys(tags) if tag in datasets]
+    parts = {tag: _load_index(*datasets[tag]) if datasets[tag][0].exists() else None for tag in tags}
+    with _UNIFIED_LOCK:
+        index = _UNIFIED if _UNIFIED is not None else UnifiedIndex()
+        if any(index.part(tag) is not None and index.part(tag)[1] is not (part[1] if part else None)
+               for tag, part in parts.items()):
+            index = UnifiedIndex()  # Readers holding the old one finish on it
+        for tag, part in parts.items():
+            known = index.part(tag)
+            if known is None:
+                index.add(tag, part)
+            elif known[1] is not None:
+                index.sync(known[0])
+        _UNIFIED = index
+    return index
+
+
+# ============ KEYWORD MATCHING ============
+class KeywordAutomaton:
+    """Aho-Corasick automaton over labelled keyword lists.
+
+    counts(text) finds every keyword occurring as a substring of text in one
+    pass and returns, for each label in table order, how many of its keywords
+    occurred (the same as summing `kw in text` over the label's list).
+    """
+
+    def __init__(self, table):
+        self.labels = []
+        self._entry_labels = []  # entry id -> label index; one entry per (label, keyword)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # node -> entry ids ending here (including via fail links)
+
+        for label, keywords in table:
+            label_idx = len(self.labels)
+            self.labels.append(label)
+            for kw in keywords:
+                node = 0
+                for ch in kw:
+                    nxt = self._goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto[node][ch] = nxt
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append([])
+                    node = nxt
+                self._out[node].append(len(self._entry_labels))
+                self._entry_labels.append(label_idx)
+
+        # Breadth-first fail links; outputs inherit those of their fail node
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def matches(self, text):
+        """Set of entry ids whose keyword occurs in text"""
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+    def counts(self, text):
+        """Label -> number of its keywords found in text, in table order"""
+        counts = [0] * len(self.labels)
+        for entry in self.matches(text):
+            counts[self._entry_labels[entry]] += 1
+        return dict(zip(self.labels, counts))
+
+
+_DOMAIN_MATCHER = KeywordAutomaton(DOMAIN_KEYWORDS.items())
 
 
 # ============ SEARCH FUNCTIONS ============
+class _Rows(Sequence):
+    """Dataset rows addressed by index; dicts are only built for rows that are returned"""
+
+    def __init__(self, fieldnames):
+        self.fieldnames = list(fieldnames)
+        self._positions = {col: pos for pos, col in enumerate(self.fieldnames)}
+
+    def _values(self, idx):
+        raise NotImplementedError
+
+    def get(self, idx, col, default=None):
+        """Single cell; a column missing from a short row reads as None (like csv.DictReader)"""
+        pos = self._positions.get(col)
+        if pos is None:
+            return default
+        values = self._values(idx)
+        return values[pos] if pos < len(values) else None
+
+    def select(self, idx, cols):
+        """Row idx as a dict of the requested columns that exist in this dataset"""
+        values = self._values(idx)
+        positions = self._positions
+        return {col: values[positions[col]] if positions[col] < len(values) else None
+                for col in cols if col in positions}
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return self.select(idx, self.fieldnames)
+
+
+class _RowTable(_Rows):
+    """Rows held as value tuples"""
+
+    def __init__(self, fieldnames, rows):
+        super().__init__(fieldnames)
+        self._rows = rows
+
+    def _values(self, idx):
+        return self._rows[idx]
+
+    def __len__(self):
+        return len(self._rows)
+
+
 def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+    """Load CSV into a compact row table"""
+    import csv
+    with span("load_csv", file=filepath.name), open(filepath, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        fieldnames = next(reader, [])
+        return _RowTable(fieldnames, [tuple(row) for row in reader if row])
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
+# ============ EXTRA DATA DIRECTORIES ============
+def set_data_dirs(paths):
+    """Replace the extra data directories merged into every dataset"""
+    global DATA_DIRS
+    DATA_DIRS = [Path(p) for p in paths]
+
+
+def _dataset_files(filepath):
+    """A bundled CSV followed by the matching files of every extra data directory"""
+    files = [filepath]
+    if DATA_DIRS:
+        relative = filepath.relative_to(DATA_DIR)
+        for data_dir in DATA_DIRS:
+            extra = data_dir / relative
+            if extra.is_file():
+                files.append(extra)
+            folder = extra.with_suffix("")
+            if folder.is_dir():
+                files.extend(sorted(folder.glob("*.csv")))
+    return files
+
 
+def _dataset_stat(files):
+    """_file_stat() of a single CSV; (newest mtime_ns, total size) of a merged dataset"""
+    if len(files) == 1:
+        return _file_stat(files[0])
+    stats = [_file_stat(f) for f in files]
+    return (max(mtime for mtime, _ in stats), sum(size for _, size in stats))
+
+
+def _parse_dataset_file(filepath, search_cols):
+    """(fieldnames, row tuples, per-row tokens) of one CSV; runs in a worker process for large merges"""
     data = _load_csv(filepath)
+    return data.fieldnames, data._rows, [BM25.tokenize(doc) for doc in _documents(data, search_cols)]
+
+
+_PARSE_POOL = None
+
+
+def _parse_files(files, search_cols):
+    """_parse_dataset_file() for each file, spread over a process pool when there are many"""
+    global _PARSE_POOL
+    if len(files) >= PARALLEL_PARSE_MIN_FILES and PARSE_WORKERS > 1:
+        try:
+            if _PARSE_POOL is None:
+                from concurrent.futures import ProcessPoolExecutor
+                _PARSE_POOL = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+            with span("parse_pool", files=len(files)):
+                return list(_PARSE_POOL.map(_parse_dataset_file, files, [search_cols] * len(files)))
+        except (OSError, RuntimeError):  # No process support, or a broken pool: parse in-process
+            _PARSE_POOL = None
+    return [_parse_dataset_file(f, search_cols) for f in files]
+
+
+def _load_dataset(files, search_cols):
+    """Merged rows and per-row tokens of a dataset's files.
+
+    Columns are the first file's, followed by any new ones from later files;
+    cells a file does not have read as "" (as an empty CSV cell would).
+    """
+    parsed = _parse_files(files, search_cols)
+    fieldnames = list(parsed[0][0])
+    for names, _, _ in parsed[1:]:
+        fieldnames.extend(name for name in names if name not in fieldnames)
+
+    rows, tokens = [], []
+    for names, file_rows, file_tokens in parsed:
+        if list(names) == fieldnames:
+            rows.extend(file_rows)
+        else:
+            positions = {name: pos for pos, name in enumerate(names)}
+            order = [positions.get(name) for name in fieldnames]
+            rows.extend(tuple(row[pos] if pos is not None and pos < len(row) else "" for pos in order)
+                        for row in file_rows)
+        tokens.extend(file_tokens)
+    return _RowTable(fieldnames, rows), tokens
+
+
+# ============ INDEX CACHE ============
+_INDEXES = {}  # (path, search_cols) -> (stat, data, bm25), reused within one process
+
+
+def _file_stat(filepath):
+    """Cheap change signature of a file: (mtime_ns, size)"""
+    st = filepath.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _content_hash(*filepaths):
+    """SHA-1 of the files' contents, in order"""
+    digest = hashlib.sha1()
+    for filepath in filepaths:
+        with open(filepath, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _cache_path(filepath, search_cols, files=None):
+    """On-disk cache location for one (CSV plus extension files, search columns) index"""
+    sources = "|".join(str(f.resolve()) for f in (files or [filepath]))
+    key = hashlib.sha1(f"{sources}|{'|'.join(search_cols)}".encode('utf-8')).hexdigest()[:16]
+    return CACHE_DIR / f"{filepath.stem}-{key}.pickle"
+
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+def _read_cache(cache_file, stat, files):
+    """Return a cached entry if it still matches the CSV, else None"""
+    import pickle
+    try:
+        with open(cache_file, 'rb') as f:
+            entry = pickle.load(f)
+    except (OSError, EOFError, pickle.PickleError, AttributeError, ImportError, ValueError):
+        return None
+    if entry.get("version") != INDEX_CACHE_VERSION:
+        return None
+    if entry["stat"] == stat:
+        return entry
+    # mtime/size changed (e.g. fresh checkout): trust the cache only if the content is identical
+    if entry["sha1"] == _content_hash(*files):
+        entry["stat"] = stat
+        _write_cache(cache_file, entry)
+        return entry
+    return None
 
-    # BM25 search
+
+_UMASK = None
+
+
+def _new_file_mode(target):
+    """Permissions for a temp file renamed over target: target's own, else those open() would give"""
+    global _UMASK
+    try:
+        return os.stat(target).st_mode & 0o7777
+    except OSError:
+        pass
+    if _UMASK is None:
+        _UMASK = os.umask(0o022)  # Reading the umask means setting it; put it straight back
+        os.umask(_UMASK)
+    return 0o666 & ~_UMASK
+
+
+def _write_cache(cache_file, entry):
+    """Atomically write a cache entry; an unwritable cache dir is not an error"""
+    import pickle
+    import tempfile
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_file)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        pass
+
+
+# ============ BINARY INDEX ============
+# Layout: MAGIC, uint32 header length, JSON header, then 8-byte aligned sections.
+# The header lists the vocabulary (term id order) and, per section, its
+# (offset, count, typecode); per-term sections are indexed by term id.
+# Postings of term t are post_docs/post_tfs
+# [post_offsets[t]:post_offsets[t + 1]]; row i is JSON in rows[row_offsets[i]:row_offsets[i + 1]].
+_INDEX_MAGIC = b"UIPXIDX2"
+_INDEX_EXT = ".idx"
+
+
+def _binary_index_path(filepath):
+    """data/stacks/react.csv -> data/index/stacks/react.idx"""
+    return (INDEX_DIR / filepath.relative_to(DATA_DIR)).with_suffix(_INDEX_EXT)
+
+
+class _MappedPostings(Sequence):
+    """term id -> (doc ids, term freqs) slices of memory-mapped postings arrays"""
+
+    def __init__(self, offsets, docs, tfs):
+        self._offsets = offsets
+        self._docs = docs
+        self._tfs = tfs
+
+    def __getitem__(self, term_id):
+        start, end = self._offsets[term_id], self._offsets[term_id + 1]
+        return self._docs[start:end], self._tfs[start:end]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+
+class _MappedRows(_Rows):
+    """Rows stored as JSON value lists inside a memory-mapped index"""
+
+    def __init__(self, fieldnames, offsets, blob):
+        super().__init__(fieldnames)
+        self._offsets = offsets
+        self._blob = blob
+
+    def _values(self, idx):
+        return json.loads(bytes(self._blob[self._offsets[idx]:self._offsets[idx + 1]]))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+
+def _write_binary_index(filepath, search_cols, out_path):
+    """Compile one CSV into the binary index format"""
+    data = _load_csv(filepath)
     bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
+    bm25.fit(_documents(data, search_cols))
+
+    post_offsets, post_docs, post_tfs = array('I', [0]), array('I'), array('I')
+    for docs, tfs in bm25.postings:
+        post_docs.extend(docs)
+        post_tfs.extend(tfs)
+        post_offsets.append(len(post_docs))
+
+    row_offsets, rows = array('I', [0]), bytearray()
+    for idx in range(len(data)):
+        values = [data.get(idx, col) for col in data.fieldnames]
+        rows += json.dumps(values, ensure_ascii=False).encode('utf-8')
+        row_offsets.append(len(rows))
+
+    sections = [
+        ("doc_lengths", bm25.doc_lengths),
+        ("doc_norms", bm25.doc_norms),
+        ("doc_freqs", bm25.doc_freqs),
+        ("idf", bm25.idf),
+        ("term_bounds", bm25.term_bounds),
+        ("post_offsets", post_offsets),
+        ("post_docs", post_docs),
+        ("post_tfs", post_tfs),
+        ("row_offsets", row_offsets),
+        ("rows", bytes(rows))
+    ]
+    header = {
+        "version": INDEX_CACHE_VERSION,
+        "byteorder": sys.byteorder,
+        "source_sha1": _content_hash(filepath),
+        "search_cols": list(search_cols),
+        "fieldnames": data.fieldnames,
+        "k1": bm25.k1,
+        "b": bm25.b,
+        "N": bm25.N,
+        "avgdl": bm25.avgdl,
+        "terms": bm25.terms,
+        "sections": {}
+    }
+
+    # Section offsets depend on the header length, so lay out until the header size settles
+    blobs = [sec.tobytes() if isinstance(sec, array) else sec for _, sec in sections]
+    header_bytes = b""
+    while True:
+        offset = len(_INDEX_MAGIC) + 4 + len(header_bytes)
+        for (name, sec), blob in zip(sections, blobs):
+            offset += -offset % 8
+            typecode = sec.typecode if isinstance(sec, array) else "B"
+            header["sections"][name] = [offset, len(sec), typecode]
+            offset += len(blob)
+        encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        if len(encoded) == len(header_bytes):
+            header_bytes = encoded
+            break
+        header_bytes = encoded
+
+    # Written beside the target and renamed over it: processes mapping the old file keep a valid mapping
+    import tempfile
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_path.parent, suffix=".tmp")
+    try:
+        os.chmod(tmp, _new_file_mode(out_path))  # A release artifact: readable like any other file, not 0600
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_INDEX_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+            for name, blob in zip((name for name, _ in sections), blobs):
+                f.write(b"\0" * (header["sections"][name][0] - f.tell()))
+                f.write(blob)
+        os.replace(tmp, out_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _read_binary_index(filepath, search_cols):
+    """Memory-map a prebuilt index for a CSV; None if absent, stale or damaged (the CSV is used instead)"""
+    index_path = _binary_index_path(filepath)
+    try:
+        with open(index_path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if mm[:len(_INDEX_MAGIC)] != _INDEX_MAGIC:
+        return None
+    start = len(_INDEX_MAGIC) + 4
+    try:
+        (header_len,) = struct.unpack("<I", mm[len(_INDEX_MAGIC):start])
+        header = json.loads(mm[start:start + header_len])
+        if (header.get("version") != INDEX_CACHE_VERSION or header.get("byteorder") != sys.byteorder
+                or header.get("search_cols") != list(search_cols)
+                or header.get("source_sha1") != _content_hash(filepath)):
+            return None
+        sec = _map_sections(mm, header)
+    except (struct.error, ValueError, KeyError, TypeError, AttributeError):  # Truncated or corrupt file
+        return None
+    if sec is None:
+        return None
+
+    bm25 = BM25(header["k1"], header["b"])
+    bm25.terms = header["terms"]
+    bm25.vocab = {term: term_id for term_id, term in enumerate(bm25.terms)}
+    bm25.N = header["N"]
+    bm25.avgdl = header["avgdl"]
+    bm25.doc_lengths = sec["doc_lengths"]
+    bm25.doc_norms = sec["doc_norms"]
+    bm25.doc_freqs = sec["doc_freqs"]
+    bm25.idf = sec["idf"]
+    bm25.term_bounds = sec["term_bounds"]
+    bm25.postings = _MappedPostings(sec["post_offsets"], sec["post_docs"], sec["post_tfs"])
+    bm25.corpus = None  # Token lists are not stored; the postings carry everything scoring needs
+    bm25._mmap = mm
+
+    rows = _MappedRows(header["fieldnames"], sec["row_offsets"], sec["rows"])
+    return rows, bm25
+
+
+def _map_sections(mm, header):
+    """Typed views of the header's sections; None unless all lie inside the file and agree in size"""
+    view = memoryview(mm)
+    sec = {}
+    for name, (offset, count, typecode) in header["sections"].items():
+        size = array(typecode).itemsize
+        if offset < 0 or count < 0 or offset + count * size > len(mm):
+            return None
+        sec[name] = view[offset:offset + count * size].cast(typecode)
+    n_docs, n_terms = header["N"], len(header["terms"])
+    if (len(sec["doc_lengths"]) != n_docs or len(sec["doc_norms"]) != n_docs
+            or len(sec["row_offsets"]) != n_docs + 1 or len(sec["post_offsets"]) != n_terms + 1
+            or any(len(sec[name]) != n_terms for name in ("doc_freqs", "idf", "term_bounds"))
+            or sec["post_offsets"][-1] > min(len(sec["post_docs"]), len(sec["post_tfs"]))
+            or sec["row_offsets"][-1] > len(sec["rows"])):
+        return None
+    return sec
+
+
+def build_binary_indexes():
+    """Compile every dataset into INDEX_DIR; returns the written paths"""
+    written = []
+    for filepath, search_cols in _datasets():
+        if filepath.exists():
+            out_path = _binary_index_path(filepath)
+            _write_binary_index(filepath, search_cols, out_path)
+            written.append(out_path)
+    return written
+
+
+def _documents(data, search_cols):
+    """Searchable text of each row: its search columns joined by spaces"""
+    return [_document(data, idx, search_cols) for idx in range(len(data))]
+
+
+def _document(data, idx, search_cols):
+    return " ".join(str(data.get(idx, col, "")) for col in search_cols)
+
+
+def _load_index(filepath, search_cols):
+    """Return (rows, fitted BM25) for a CSV, reusing in-process and on-disk caches"""
+    search_cols = tuple(search_cols)
+    key = (str(filepath), search_cols)
+    cached = _INDEXES.get(key)
+    if cached and _WATCHED:  # The watcher swaps in a new index when the files change
+        return cached[1], cached[2]
+
+    files = _dataset_files(filepath)
+    stat = _dataset_stat(files)
+    if cached and cached[0] == stat:
+        return cached[1], cached[2]
+
+    data, bm25 = _build_index(filepath, search_cols, files, stat)
+    _INDEXES[key] = (stat, data, bm25)
+    return data, bm25
+
+
+def _build_index(filepath, search_cols, files, stat):
+    """(rows, fitted BM25) of a dataset's current files, from the binary index, the cache or a fresh fit"""
+    if len(files) == 1:  # Binary indexes cover the bundled CSV alone
+        with span("index.read_binary", file=filepath.name):
+            mapped = _read_binary_index(filepath, search_cols)
+        if mapped is not None:
+            return mapped
+
+    cache_file = _cache_path(filepath, search_cols, files)
+    with span("index.read_cache", file=filepath.name):
+        entry = _read_cache(cache_file, stat, files)
+    if entry is None:
+        data, tokens = _load_dataset(files, search_cols)
+        bm25 = BM25()
+        with span("bm25.fit", file=filepath.name, docs=len(data)):
+            bm25.fit_tokens(tokens)
+
+        entry = {
+            "version": INDEX_CACHE_VERSION,
+            "stat": stat,
+            "sha1": _content_hash(*files),
+            "data": data,
+            "bm25": bm25
+        }
+        _write_cache(cache_file, entry)
+
+    return entry["data"], entry["bm25"]
+
+
+def _engine():
+    """Engine to score with: the configured one, or "python" if NumPy/FTS5 is unavailable"""
+    if DEFAULT_ENGINE == "numpy" and _import_numpy():
+        return "numpy"
+    if DEFAULT_ENGINE == "sqlite" and _fts_available():
+        return "sqlite"
+    return "python"
+
+
+def set_engine(name):
+    """Select the scoring engine for this process; returns the engine that will be used"""
+    global DEFAULT_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine: {name}. Available: {', '.join(ENGINES)}")
+    DEFAULT_ENGINE = name
+    return _engine()
+
+
+def _rank_many(bm25, queries, k):
+    """top_k rankings for each query with the active engine"""
+    engine = _engine()
+    with span("score", engine=engine, queries=len(queries)):
+        if engine == "numpy" and not bm25.live:  # An edited index has no fixed weights to precompute
+            matrix = getattr(bm25, "_sparse_matrix", None)
+            if matrix is None:
+                matrix = bm25._sparse_matrix = SparseBM25Matrix(bm25)
+            return matrix.top_k_many(queries, k)
+        return [bm25.top_k(query, k) for query in queries]
+
+
+# ============ RESULT CACHE ============
+_RESULT_CACHE = None  # ResultCache while enabled
+
+
+def set_result_cache(enabled, path=None, max_entries=RESULT_CACHE_SIZE):
+    """Turn the persistent result cache on (at path, default RESULT_CACHE_FILE) or off"""
+    global _RESULT_CACHE
+    if enabled:
+        from result_cache import ResultCache
+        _RESULT_CACHE = ResultCache(Path(path) if path else RESULT_CACHE_FILE, max_entries)
+    else:
+        _RESULT_CACHE = None
+
+
+def _cached_search_many(filepath, search_cols, output_cols, queries, max_results):
+    """_rank_csv_many() answered from the result cache where possible.
+
+    Keys use the normalised query tokens, which fully determine the ranking; the
+    fingerprint ties entries to this version of the CSV and of the scorer.
+    """
+    files = _dataset_files(filepath)
+    fingerprint = f"{RESULT_CACHE_SCHEMA}:{INDEX_CACHE_VERSION}:{':'.join(map(str, _dataset_stat(files)))}"
+    if len(files) > 1:
+        fingerprint += ":" + hashlib.sha1("|".join(map(str, files)).encode('utf-8')).hexdigest()[:16]
+    engine = _engine()
+    keys = [json.dumps([engine, FUZZY_DISTANCE, str(filepath), list(search_cols), list(output_cols), BM25.tokenize(query), max_results],
+                       ensure_ascii=False) for query in queries]
+    with span("result_cache.get", file=filepath.name, queries=len(queries)):
+        found = _RESULT_CACHE.get_many(keys, fingerprint)
+
+    missing = {key: query for key, query in zip(keys, queries) if key not in found}
+    if missing:
+        computed = _rank_csv_many(filepath, search_cols, output_cols, list(missing.values()), max_results)
+        stored = {key: json.dumps(results, ensure_ascii=False) for key, results in zip(missing, computed)}
+        with span("result_cache.put", file=filepath.name, queries=len(stored)):
+            _RESULT_CACHE.put_many(stored, fingerprint)
+        found.update(stored)
+    return [json.loads(found[key]) for key in keys]
+
+
+# ============ DATASET SEARCH ============
+def _search_csv_many(filepath, search_cols, output_cols, queries, max_results):
+    """Core search function using BM25, for a list of queries"""
+    if not filepath.exists():
+        return [[] for _ in queries]
+    if _RESULT_CACHE is not None and not _edited(filepath, search_cols):
+        return _cached_search_many(filepath, search_cols, output_cols, queries, max_results)
+    return _rank_csv_many(filepath, search_cols, output_cols, queries, max_results)
+
+
+def _rank_csv_many(filepath, search_cols, output_cols, queries, max_results):
+    """BM25 results (output columns of matching rows) for each query"""
+    if _engine() == "sqlite":
+        with span("score", engine="sqlite", queries=len(queries)):
+            results = _fts_index().search_many(filepath, search_cols, output_cols, queries, max_results)
+        if results is not None:
+            return results  # Otherwise (e.g. unwritable database) fall back to the in-memory index
+
+    data, bm25 = _load_index(filepath, search_cols)
 
     # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+    return [[data.select(idx, output_cols) for idx, score in ranked if score > 0]
+            for ranked in _rank_many(bm25, queries, max_results)]
 
-    return results
+
+def _search_csv(filepath, search_cols, output_cols, query, max_results):
+    """Core search function using BM25"""
+    return _search_csv_many(filepath, search_cols, output_cols, [query], max_results)[0]
 
 
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
-
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
+    scores = _DOMAIN_MATCHER.counts(query.lower())
     best = max(scores, key=scores.get)
     return best if scores[best] > 0 else "style"
 
 
 def search(query, domain=None, max_results=MAX_RESULTS):
     """Main search function with auto-domain detection"""
-    if domain is None:
-        domain = detect_domain(query)
+    return search_many([query], domain, max_results)[0]
 
-    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
-    filepath = DATA_DIR / config["file"]
 
-    if not filepath.exists():
-        return {"error": f"File not found: {filepath}", "domain": domain}
+def search_many(queries, domain=None, max_results=MAX_RESULTS):
+    """search() for a list of queries, scored together per domain; results in input order"""
+    domains = [domain if domain is not None else detect_domain(query) for query in queries]
+    responses = [None] * len(queries)
+
+    for target in dict.fromkeys(domains):
+        positions = [i for i, d in enumerate(domains) if d == target]
+        config = CSV_CONFIG.get(target, CSV_CONFIG["style"])
+        filepath = DATA_DIR / config["file"]
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+        if not filepath.exists():
+            for i in positions:
+                responses[i] = {"error": f"File not found: {filepath}", "domain": target}
+            continue
 
+        batch = [queries[i] for i in positions]
+        for i, results in zip(positions, _search_csv_many(filepath, config["search_cols"], config["output_cols"], batch, max_results)):
+            responses[i] = _domain_response(target, queries[i], results)
+
+    return responses
+
+
+def _domain_response(domain, query, results):
+    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
     return {
         "domain": domain,
         "query": query,
@@ -231,23 +1545,357 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     }
 
 
+def _stack_response(stack, query, results):
+    return {
+        "domain": "stack",
+        "stack": stack,
+        "query": query,
+        "file": STACK_CONFIG[stack]["file"],
+        "count": len(results),
+        "results": results
+    }
+
+
 def search_stack(query, stack, max_results=MAX_RESULTS):
     """Search stack-specific guidelines"""
+    return search_stack_many([query], stack, max_results)[0]
+
+
+def search_stack_many(queries, stack, max_results=MAX_RESULTS):
+    """search_stack() for a list of queries, scored together; results in input order"""
     if stack not in STACK_CONFIG:
-        return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+        return [{"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"} for _ in queries]
 
     filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
 
     if not filepath.exists():
-        return {"error": f"Stack file not found: {filepath}", "stack": stack}
+        return [{"error": f"Stack file not found: {filepath}", "stack": stack} for _ in queries]
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    batch = _search_csv_many(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], queries, max_results)
 
-    return {
-        "domain": "stack",
-        "stack": stack,
-        "query": query,
-        "file": STACK_CONFIG[stack]["file"],
-        "count": len(results),
-        "results": results
-    }
+    return [_stack_response(stack, query, results) for query, results in zip(queries, batch)]
+
+
+def search_all(query, domains=None, stacks=None, k_per_domain=MAX_RESULTS):
+    """Search several domains (and optionally stacks) in one pass over a unified index.
+
+    domains defaults to every CSV_CONFIG domain. k_per_domain is an int or a
+    {domain: k} dict. Returns {domain: search() response}, with stacks keyed
+    as "stack:<name>" and shaped like search_stack() responses.
+    """
+    domains = list(CSV_CONFIG) if domains is None else list(domains)
+    responses = {}
+    wanted = []  # (response key, filepath, search_cols, k, output_cols)
+
+    for domain in domains:
+        if domain not in CSV_CONFIG:
+            responses[domain] = {"error": f"Unknown domain: {domain}. Available: {', '.join(CSV_CONFIG)}", "domain": domain}
+            continue
+        k = k_per_domain.get(domain, MAX_RESULTS) if isinstance(k_per_domain, dict) else k_per_domain
+        responses[domain] = None  # Filled below; keeps the requested order
+        config = CSV_CONFIG[domain]
+        wanted.append((domain, DATA_DIR / config["file"], config["search_cols"], k, config["output_cols"]))
+    for stack in stacks or []:
+        key = f"stack:{stack}"
+        if stack not in STACK_CONFIG:
+            responses[key] = {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+            continue
+        k = k_per_domain.get(key, MAX_RESULTS) if isinstance(k_per_domain, dict) else k_per_domain
+        responses[key] = None
+        wanted.append((key, DATA_DIR / STACK_CONFIG[stack]["file"], _STACK_COLS["search_cols"], k, _STACK_COLS["output_cols"]))
+
+    found = {}  # response key -> results
+    if _engine() == "sqlite":
+        # FTS5 tables are per dataset, so each requested one is queried in turn
+        for key, filepath, search_cols, k, output_cols in wanted:
+            if filepath.exists():
+                found[key] = _search_csv_many(filepath, search_cols, output_cols, [query], k)[0]
+    else:
+        index = _unified_index([key for key, *_ in wanted])
+        slots = {key: index.slot(key) for key, *_ in wanted}
+        with span("score.unified", slots=len(wanted)):
+            ranked = index.top_k(query, {slots[key]: k for key, _, _, k, _ in wanted if slots[key] is not None})
+        for key, _, _, k, output_cols in wanted:
+            slot = slots[key]
+            if slot is not None:
+                data = index.rows[slot]
+                found[key] = [data.select(idx, output_cols) for idx, score in ranked[slot] if score > 0]
+
+    for key, filepath, _, _, _ in wanted:
+        stack = key[len("stack:"):] if key.startswith("stack:") else None
+        if key not in found:
+            responses[key] = {"error": f"File not found: {filepath}", "domain": key}
+        else:
+            results = found[key]
+            responses[key] = _stack_response(stack, query, results) if stack else _domain_response(key, query, results)
+    return responses
+
+
+def _datasets():
+    """(filepath, search_cols) for every domain and stack CSV"""
+    for _, filepath, search_cols in _tagged_datasets():
+        yield filepath, search_cols
+
+
+def _tagged_datasets():
+    """(tag, filepath, search_cols) for every dataset; stacks are tagged "stack:<name>" """
+    for domain, config in CSV_CONFIG.items():
+        yield domain, DATA_DIR / config["file"], config["search_cols"]
+    for stack, config in STACK_CONFIG.items():
+        yield f"stack:{stack}", DATA_DIR / config["file"], _STACK_COLS["search_cols"]
+
+
+def data_version():
+    """Fingerprint of every domain and stack CSV (with extension files); changes whenever one is edited.
+
+    While a watcher is running, loaded datasets report the version they were
+    loaded from, so the fingerprint only changes once the new index is swapped in.
+    Datasets edited in memory (update_dataset()) add their index's edit count.
+    """
+    version = []
+    for filepath, search_cols in _datasets():
+        key = (str(filepath), tuple(search_cols))
+        cached = _INDEXES.get(key)
+        if cached is not None and _WATCHED:
+            stat = cached[0]
+        else:
+            stat = _dataset_stat(_dataset_files(filepath)) if filepath.exists() else None
+        if cached is not None and _EDITED.get(key) is cached[2]:
+            stat = (stat, cached[2].version)
+        version.append(stat)
+    return tuple(version)
+
+
+def preload():
+    """Load every domain and stack index into memory (for long-running processes)"""
+    for filepath, search_cols in _datasets():
+        if filepath.exists():
+            _load_index(filepath, search_cols)
+
+
+# ============ INCREMENTAL UPDATES ============
+KEY_COLUMN = "No"  # Identifies a row across edits; unique within every dataset
+
+_ROW_KEYS = {}  # (path, search_cols) -> (bm25, {key: row idx})
+_EDITED = {}  # (path, search_cols) -> bm25 holding rows its files do not have
+
+
+def _dataset_target(name):
+    """(filepath, search_cols) of a domain, or of a stack tagged "stack:<name>" """
+    for tag, filepath, search_cols in _tagged_datasets():
+        if tag == name:
+            return filepath, tuple(search_cols)
+    raise ValueError(f"Unknown dataset: {name}. Available: {', '.join(tag for tag, _, _ in _tagged_datasets())}")
+
+
+def _edited(filepath, search_cols):
+    """Whether the loaded index of a dataset differs from its files (results must not be cached)"""
+    key = (str(filepath), tuple(search_cols))
+    cached = _INDEXES.get(key)
+    return cached is not None and _EDITED.get(key) is cached[2]
+
+
+def _editable_index(filepath, search_cols, reload=True):
+    """(rows, bm25, {key: row idx}) of a dataset, in a form that can be edited.
+
+    With reload=False the loaded index is used even if the files changed since.
+    Memory-mapped indexes are read-only, so the first edit copies their rows into
+    a row table and refits from it once.
+    """
+    key = (str(filepath), search_cols)
+    if reload or key not in _INDEXES:
+        data, bm25 = _load_index(filepath, search_cols)
+    else:
+        data, bm25 = _INDEXES[key][1:]
+    if bm25.corpus is None or not isinstance(data, _RowTable):
+        data = _RowTable(data.fieldnames, [tuple(data.get(idx, col) for col in data.fieldnames) for idx in range(len(data))])
+        bm25 = BM25(bm25.k1, bm25.b)
+        bm25.fit(_documents(data, search_cols))
+        _INDEXES[key] = (_INDEXES[key][0], data, bm25)
+    if not isinstance(data._rows, list):
+        data._rows = list(data._rows)
+
+    known = _ROW_KEYS.get(key)
+    if known is None or known[0] is not bm25:
+        position = data._positions.get(KEY_COLUMN)
+        if position is None:
+            raise ValueError(f"{filepath.name} has no {KEY_COLUMN} column")
+        keys = {}
+        for idx, values in enumerate(data._rows):
+            if bm25.corpus[idx] is not None and position < len(values):
+                keys[str(values[position])] = idx
+        known = _ROW_KEYS[key] = (bm25, keys)
+    return data, bm25, known[1]
+
+
+def _apply_edits(data, bm25, keys, upserts, deletes, search_cols):
+    """Apply {key: row values} upserts and deleted keys to a row table and its index; returns counts"""
+    counts = {"added": 0, "replaced": 0, "deleted": 0}
+    for key in deletes:
+        idx = keys.pop(key, None)
+        if idx is not None:
+            bm25.remove_document(idx)
+            data._rows[idx] = ()
+            counts["deleted"] += 1
+    for key, (values, tokens) in upserts.items():
+        old = keys.get(key)
+        if old is not None:
+            bm25.remove_document(old)
+            data._rows[old] = ()
+        data._rows.append(values)
+        idx = len(data._rows) - 1
+        if tokens is None:
+            tokens = BM25.tokenize(_document(data, idx, search_cols))
+        keys[key] = bm25.add_tokens(tokens)
+        counts["replaced" if old is not None else "added"] += 1
+    return counts
+
+
+def update_dataset(name, upserts=(), deletes=()):
+    """Add, replace or delete rows of a loaded dataset without refitting its index.
+
+    name is a domain or "stack:<name>". upserts are row dicts keyed by column
+    name and matched to existing rows by KEY_COLUMN; columns the dataset does not
+    have are ignored and missing ones read as "". deletes are KEY_COLUMN values.
+    Returns {"added": n, "replaced": n, "deleted": n}.
+
+    Edits live in this process only, until the dataset's files change and it is
+    reloaded; they are not seen by the sqlite engine, which reads the files.
+    Replaced rows move to the end, so exact score ties may order differently
+    than after a fresh load.
+    """
+    filepath, search_cols = _dataset_target(name)
+    data, bm25, keys = _editable_index(filepath, search_cols)
+    deletes = [str(key) for key in deletes]
+    changes = {}
+    for row in upserts:
+        if row.get(KEY_COLUMN) in (None, ""):
+            raise ValueError(f"Row without a {KEY_COLUMN} value: {row}")
+        values = tuple("" if row.get(col) is None else str(row[col]) for col in data.fieldnames)
+        changes[str(row[KEY_COLUMN])] = (values, None)
+    _EDITED[(str(filepath), search_cols)] = bm25
+    with span("index.update", file=filepath.name, upserts=len(changes), deletes=len(deletes)):
+        return _apply_edits(data, bm25, keys, changes, deletes, search_cols)
+
+
+def refresh_dataset(name):
+    """Bring a loaded dataset in line with its files by re-indexing only the rows that changed.
+
+    Rows are compared by KEY_COLUMN. A dataset that is not loaded yet, whose
+    columns changed or whose keys are not unique is loaded from scratch instead
+    ("rebuilt": True). Returns the counts of update_dataset().
+    """
+    filepath, search_cols = _dataset_target(name)
+    key = (str(filepath), search_cols)
+    counts = {"added": 0, "replaced": 0, "deleted": 0, "rebuilt": False}
+    if not filepath.exists():
+        raise ValueError(f"File not found: {filepath}")
+    files = _dataset_files(filepath)
+    stat = _dataset_stat(files)
+    cached = _INDEXES.get(key)
+    if cached is not None and cached[0] == stat:
+        return counts
+
+    if cached is not None:
+        data, bm25, keys = _editable_index(filepath, search_cols, reload=False)
+        fresh, tokens = _load_dataset(files, search_cols)
+        position = fresh._positions.get(KEY_COLUMN)
+        if fresh.fieldnames == data.fieldnames and position is not None:
+            fresh_keys = [str(values[position]) if position < len(values) else None for values in fresh._rows]
+            if None not in fresh_keys and len(set(fresh_keys)) == len(fresh_keys):
+                upserts = {k: (values, row_tokens) for k, values, row_tokens in zip(fresh_keys, fresh._rows, tokens)
+                           if k not in keys or data._rows[keys[k]] != values}
+                deletes = set(keys).difference(fresh_keys)
+                with span("index.refresh", file=filepath.name, upserts=len(upserts), deletes=len(deletes)):
+                    counts.update(_apply_edits(data, bm25, keys, upserts, deletes, search_cols))
+                _INDEXES[key] = (stat, data, bm25)
+                _EDITED.pop(key, None)  # Matches the files again
+                return counts
+
+    _INDEXES.pop(key, None)
+    _load_index(filepath, search_cols)
+    counts["rebuilt"] = True
+    return counts
+
+
+# ============ HOT RELOAD ============
+_WATCHED = False  # True while a watcher (see watcher.py) keeps loaded indexes current
+_RELOAD_LOCK = threading.Lock()
+
+
+def set_watched(enabled):
+    """Let queries use loaded indexes without checking their files (a watcher reloads them)"""
+    global _WATCHED
+    _WATCHED = bool(enabled)
+
+
+def watch_dirs():
+    """Existing directories whose CSVs make up the datasets, bundled and extra"""
+    dirs = {}
+    for filepath, _ in _datasets():
+        dirs[filepath.parent] = None
+        for data_dir in DATA_DIRS:
+            extra = data_dir / filepath.relative_to(DATA_DIR)
+            dirs[extra.parent] = None
+            dirs[extra.with_suffix("")] = None
+    return [d for d in dirs if d.is_dir()]
+
+
+def reload_index(filepath, search_cols):
+    """Build a dataset's index from its current files, then swap it in with a single assignment.
+
+    Queries already running keep the index they started with; the ones after
+    the swap see the new one, never a partial build.
+    """
+    search_cols = tuple(search_cols)
+    files = _dataset_files(filepath)
+    stat = _dataset_stat(files)  # Taken before reading: a write during the build shows up as stale again
+    with span("index.reload", file=filepath.name):
+        data, bm25 = _build_index(filepath, search_cols, files, stat)
+    _INDEXES[(str(filepath), search_cols)] = (stat, data, bm25)
+
+
+def reload_changed():
+    """Rebuild every loaded index (and FTS table) whose files changed since it was loaded; returns their tags"""
+    reloaded = []
+    fts = _FTS if _engine() == "sqlite" else None
+    with _RELOAD_LOCK:
+        for tag, filepath, search_cols in _tagged_datasets():
+            key = (str(filepath), tuple(search_cols))
+            cached = _INDEXES.get(key)
+            known = fts._tables.get(key) if fts is not None else None
+            if cached is None and known is None:
+                continue  # Loaded from the current files on first use
+            try:
+                stat = _dataset_stat(_dataset_files(filepath))
+            except OSError:
+                continue  # Deleted or mid-rename: keep serving what is loaded
+            if cached is not None and cached[0] != stat:
+                reload_index(filepath, search_cols)
+            elif known is None or known[0] == stat:
+                continue
+            if known is not None and known[0] != stat:
+                with fts._lock:  # The FTS build commits in one transaction
+                    fts.table(filepath, search_cols)
+            reloaded.append(tag)
+        if reloaded and _UNIFIED is not None:
+            _unified_index(_UNIFIED.tags)  # Rebuild it here rather than in the next search_all()
+    return reloaded
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="UI Pro Max index tools")
+    parser.add_argument("--build-index", action="store_true", help=f"Compile all CSV data into binary indexes under {INDEX_DIR}")
+    parser.add_argument("--build-fts", action="store_true", help=f"Build the SQLite FTS5 database used by --engine sqlite ({FTS_DATABASE})")
+    args = parser.parse_args()
+
+    if args.build_index:
+        for path in build_binary_indexes():
+            print(f"Wrote {path}")
+    if args.build_fts:
+        print(f"Wrote {build_fts_database()}")
+    if not (args.build_index or args.build_fts):
+        parser.print_help()
@@ -13,12 +13,21 @@ Usage:
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
 """
 
+import copy
 import csv
+import hashlib
 import json
 import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+import core
+from core import search, search_all, data_version, DATA_DIR, KeywordAutomaton
+from timings import span
 
 
 # ============ CONFIGURATION ============
@@ -32,6 +41,28 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+# Worker threads for generating page overrides concurrently
+SEARCH_WORKERS = len(SEARCH_CONFIG)
+
+# Memoised generate() results kept by the shared generator
+GENERATE_CACHE_SIZE = 256
+
+# Page type -> context keywords, in priority order (see _detect_page_type)
+PAGE_PATTERNS = {
+    "Dashboard / Data View": ["dashboard", "admin", "analytics", "data", "metrics", "stats", "monitor", "overview"],
+    "Checkout / Payment": ["checkout", "payment", "cart", "purchase", "order", "billing"],
+    "Settings / Profile": ["settings", "profile", "account", "preferences", "config"],
+    "Landing / Marketing": ["landing", "marketing", "homepage", "hero", "home", "promo"],
+    "Authentication": ["login", "signin", "signup", "register", "auth", "password"],
+    "Pricing / Plans": ["pricing", "plans", "subscription", "tiers", "packages"],
+    "Blog / Article": ["blog", "article", "post", "news", "content", "story"],
+    "Product Detail": ["product", "item", "detail", "pdp", "shop", "store"],
+    "Search Results": ["search", "results", "browse", "filter", "catalog", "list"],
+    "Empty State": ["empty", "404", "error", "not found", "zero"],
+}
+
+_PAGE_MATCHER = KeywordAutomaton(PAGE_PATTERNS.items())
+
 
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
@@ -39,6 +70,7 @@ class DesignSystemGenerator:
 
     def __init__(self):
         self.reasoning_data = self._load_reasoning()
+        self._index_reasoning()
 
     def _load_reasoning(self) -> list:
         """Load reasoning rules from CSV."""
@@ -48,42 +80,53 @@ class DesignSystemGenerator:
         with open(filepath, 'r', encoding='utf-8') as f:
             return list(csv.DictReader(f))
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
-        for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
-            else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
+    def _index_reasoning(self):
+        """Precompute lookup tables for _find_reasoning_rule (first rule in file order wins)."""
+        self._exact_rules = {}
+        self._category_rules = []
+        self._keyword_rules = {}
+        self._decision_rules = {}
+        for rule in self.reasoning_data:
+            try:
+                self._decision_rules[id(rule)] = json.loads(rule.get("Decision_Rules", "{}"))
+            except json.JSONDecodeError:
+                self._decision_rules[id(rule)] = {}
+            ui_cat = rule.get("UI_Category", "").lower()
+            self._exact_rules.setdefault(ui_cat, rule)
+            self._category_rules.append((ui_cat, rule))
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                # Insertion order follows the first rule using each keyword
+                self._keyword_rules.setdefault(kw, rule)
+        self._rule_cache = {}
+
+    def _style_search(self, query: str, style_priority: list = None) -> dict:
+        """Style search, with the reasoning rule's priority styles added to the query."""
+        if style_priority:
+            # For style, also search with priority keywords
+            query = f"{query} {' '.join(style_priority[:2])}"
+        return search(query, "style", SEARCH_CONFIG["style"]["max_results"])
 
     def _find_reasoning_rule(self, category: str) -> dict:
         """Find matching reasoning rule for a category."""
         category_lower = category.lower()
+        if category_lower in self._rule_cache:
+            return self._rule_cache[category_lower]
 
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
+        with span("reasoning_rule", category=category):
+            # Try exact match first
+            rule = self._exact_rules.get(category_lower)
 
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
+            # Try partial match
+            if rule is None:
+                rule = next((r for ui_cat, r in self._category_rules
+                             if ui_cat in category_lower or category_lower in ui_cat), None)
 
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
+            # Try keyword match
+            if rule is None:
+                rule = next((r for kw, r in self._keyword_rules.items() if kw in category_lower), {})
 
-        return {}
+        self._rule_cache[category_lower] = rule
+        return rule
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
@@ -101,12 +144,8 @@ class DesignSystemGenerator:
                 "severity": "MEDIUM"
             }
 
-        # Parse decision rules JSON
-        decision_rules = {}
-        try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
-            pass
+        # Decision rules JSON is decoded once at load
+        decision_rules = copy.deepcopy(self._decision_rules.get(id(rule), {}))
 
         return {
             "pattern": rule.get("Recommended_Pattern", ""),
@@ -162,20 +201,27 @@ class DesignSystemGenerator:
 
     def generate(self, query: str, project_name: str = None) -> dict:
         """Generate complete design system recommendation."""
-        # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
-        product_results = product_result.get("results", [])
-        category = "General"
-        if product_results:
-            category = product_results[0].get("Product Type", "General")
-
-        # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
-        style_priority = reasoning.get("style_priority", [])
-
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            # Step 1: One unified-index pass serves the domains that don't depend on the category;
+            # it runs on one background thread alongside the product search, reasoning and style search below
+            domains = [d for d in SEARCH_CONFIG if d not in ("product", "style")]
+            others_future = pool.submit(search_all, query, domains,
+                                        k_per_domain={d: SEARCH_CONFIG[d]["max_results"] for d in domains})
+            product_result = search(query, "product", SEARCH_CONFIG["product"]["max_results"])
+            product_results = product_result.get("results", [])
+            category = "General"
+            if product_results:
+                category = product_results[0].get("Product Type", "General")
+
+            # Step 2: Get reasoning rules for this category
+            reasoning = self._apply_reasoning(category, {})
+            style_priority = reasoning.get("style_priority", [])
+
+            # Step 3: Style search with style priority hints
+            style_result = self._style_search(query, style_priority)
+            search_results = others_future.result()
+        search_results["product"] = product_result
+        search_results["style"] = style_result
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -236,6 +282,65 @@ class DesignSystemGenerator:
         }
 
 
+# ============ SHARED GENERATOR ============
+_generator = None
+_generator_version = None
+_generate_cache = OrderedDict()
+_generator_lock = threading.Lock()
+
+
+def _data_version() -> tuple:
+    """Fingerprint of the search datasets and the reasoning rules."""
+    reasoning_file = DATA_DIR / REASONING_FILE
+    reasoning_stat = reasoning_file.stat() if reasoning_file.exists() else None
+    reasoning_version = (reasoning_stat.st_mtime_ns, reasoning_stat.st_size) if reasoning_stat else None
+    return (data_version(), reasoning_version)
+
+
+def get_generator() -> DesignSystemGenerator:
+    """Process-wide generator; rebuilt (and the memo cleared) when data files change."""
+    global _generator, _generator_version
+    version = _data_version()
+    with _generator_lock:
+        if _generator is None or _generator_version != version:
+            _generator = DesignSystemGenerator()
+            _generator_version = version
+            _generate_cache.clear()
+        return _generator
+
+
+def clear_cache():
+    """Drop the shared generator and every memoised result."""
+    global _generator, _generator_version
+    with _generator_lock:
+        _generator = None
+        _generator_version = None
+        _generate_cache.clear()
+
+
+def generate_cached(query: str, project_name: str = None) -> dict:
+    """generate() on the shared generator, memoised in a bounded LRU."""
+    generator = get_generator()
+    # Results also depend on the scoring engine and fuzzy matching, which core's setters can change
+    key = (query, project_name, core.DEFAULT_ENGINE, core.FUZZY_DISTANCE)
+    with _generator_lock:
+        if key in _generate_cache:
+            _generate_cache.move_to_end(key)
+            return copy.deepcopy(_generate_cache[key])
+
+    with span("generate", query=query):
+        design_system = generator.generate(query, project_name)
+
+    with _generator_lock:
+        # Skip storing if the data changed (and the generator was replaced) meanwhile
+        if generator is _generator:
+            _generate_cache[key] = design_system
+            _generate_cache.move_to_end(key)
+            while len(_generate_cache) > GENERATE_CACHE_SIZE:
+                _generate_cache.popitem(last=False)
+    return copy.deepcopy(design_system)
+
+
 # ============ OUTPUT FORMATTERS ============
 BOX_WIDTH = 90  # Wider box for more content
 
@@ -460,7 +565,7 @@ def format_markdown(design_system: dict) -> str:
 
 # ============ MAIN ENTRY POINT ============
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
-                           persist: bool = False, page: str = None, output_dir: str = None) -> str:
+                           persist: bool = False, page=None, output_dir: str = None) -> str:
     """
     Main entry point for design system generation.
 
@@ -469,37 +574,91 @@ def generate_design_system(query: str, project_name: str = None, output_format:
         project_name: Optional project name for output header
         output_format: "ascii" (default) or "markdown"
         persist: If True, save design system to design-system/ folder
-        page: Optional page name for page-specific override file
+        page: Optional page name, or list of page names, for page-specific override files
         output_dir: Optional output directory (defaults to current working directory)
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
-    
+    design_system = generate_cached(query, project_name)
+
     # Persist to files if requested
     if persist:
         persist_design_system(design_system, page, output_dir, query)
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    return render_design_system(design_system, output_format)
+
+
+def render_design_system(design_system: dict, output_format: str = "ascii") -> str:
+    """Format a generated design system as "ascii" (default) or "markdown"."""
+    with span("format", format=output_format):
+        if output_format == "markdown":
+            return format_markdown(design_system)
+        return format_ascii_box(design_system)
 
 
 # ============ PERSISTENCE FUNCTIONS ============
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+MANIFEST_FILE = ".manifest.json"
+
+# "Generated:" timestamp lines are left out of content hashes so re-runs with the same output are no-ops
+_GENERATED_LINE = re.compile(r"^(?:> )?\*\*Generated:\*\* .*$", re.MULTILINE)
+
+
+def _content_hash(content: str) -> str:
+    """SHA-256 of file content, ignoring the generation timestamp."""
+    return hashlib.sha256(_GENERATED_LINE.sub("", content).encode('utf-8')).hexdigest()
+
+
+def _atomic_write(filepath: Path, content: str):
+    """Write via a temp file in the same directory and rename over the target."""
+    fd, tmp = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.chmod(tmp, core._new_file_mode(filepath))  # mkstemp creates 0600; keep the usual permissions
+        os.replace(tmp, filepath)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _load_manifest(manifest_file: Path) -> dict:
+    """Previously written files: relative path -> {sha256, mtime_ns, size}."""
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _is_unchanged(filepath: Path, entry: dict, digest: str) -> bool:
+    """True if the file on disk is still exactly what we last wrote with this content hash."""
+    if not entry or entry.get("sha256") != digest:
+        return False
+    try:
+        st = filepath.stat()
+    except OSError:
+        return False
+    # A differing stat means someone edited the file since; rewrite it
+    return entry.get("mtime_ns") == st.st_mtime_ns and entry.get("size") == st.st_size
+
+
+def persist_design_system(design_system: dict, page=None, output_dir: str = None, page_query: str = None,
+                          max_workers: int = SEARCH_WORKERS) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
     
     Args:
         design_system: The generated design system dictionary
-        page: Optional page name for page-specific override file
+        page: Optional page name, or list of page names, for page-specific override files
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
+        max_workers: Worker threads used to generate page overrides concurrently
     
     Returns:
-        dict with created file paths and status
+        dict with status, every persisted path ("created_files"), and which of
+        them were rewritten ("written_files") or already up to date ("unchanged_files")
     """
     base_dir = Path(output_dir) if output_dir else Path.cwd()
     
@@ -510,35 +669,64 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     design_system_dir = base_dir / "design-system" / project_slug
     pages_dir = design_system_dir / "pages"
     
-    created_files = []
+    pages = [page] if isinstance(page, str) else [p for p in (page or []) if p]
+    
+    # Render everything first (page overrides concurrently, sharing the loaded indexes)
+    with span("persist.render", pages=len(pages)):
+        contents = [(design_system_dir / "MASTER.md", format_master_md(design_system))]
+        if pages:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                page_contents = pool.map(lambda p: format_page_override_md(design_system, p, page_query), pages)
+                for page_name, page_content in zip(pages, page_contents):
+                    contents.append((pages_dir / f"{page_slug(page_name)}.md", page_content))
     
     # Create directories
     design_system_dir.mkdir(parents=True, exist_ok=True)
     pages_dir.mkdir(parents=True, exist_ok=True)
     
-    master_file = design_system_dir / "MASTER.md"
-    
-    # Generate and write MASTER.md
-    master_content = format_master_md(design_system)
-    with open(master_file, 'w', encoding='utf-8') as f:
-        f.write(master_content)
-    created_files.append(str(master_file))
+    # Then write them out in one pass, skipping files whose content is unchanged
+    manifest_file = design_system_dir / MANIFEST_FILE
+    manifest = _load_manifest(manifest_file)
+    created_files = []
+    written_files = []
+    unchanged_files = []
+    for filepath, content in contents:
+        created_files.append(str(filepath))
+        key = filepath.relative_to(design_system_dir).as_posix()
+        digest = _content_hash(content)
+        if _is_unchanged(filepath, manifest.get(key), digest):
+            unchanged_files.append(str(filepath))
+            continue
+        with span("persist.write", file=key):
+            _atomic_write(filepath, content)
+        st = filepath.stat()
+        manifest[key] = {"sha256": digest, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        written_files.append(str(filepath))
     
-    # If page is specified, create page override file with intelligent content
-    if page:
-        page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
-        with open(page_file, 'w', encoding='utf-8') as f:
-            f.write(page_content)
-        created_files.append(str(page_file))
+    if written_files:
+        with span("persist.write", file=MANIFEST_FILE):
+            _atomic_write(manifest_file, json.dumps(manifest, indent=2, sort_keys=True) + "\n")
     
     return {
         "status": "success",
         "design_system_dir": str(design_system_dir),
-        "created_files": created_files
+        "created_files": created_files,
+        "written_files": written_files,
+        "unchanged_files": unchanged_files
     }
 
 
+def page_slug(page_name: str) -> str:
+    """File name (without extension) of a page override."""
+    return page_name.lower().replace(' ', '-')
+
+
+def load_pages_manifest(path: str) -> list:
+    """Read page names from a manifest: one per line, blank lines and # comments ignored."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+
 def format_master_md(design_system: dict) -> str:
     """Format design system as MASTER.md with hierarchical override logic."""
     project = design_system.get("project_name", "PROJECT")
@@ -918,16 +1106,15 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
     Uses the existing search infrastructure to find relevant style, UX, and layout
     data instead of hardcoded page types.
     """
-    from core import search
-    
     page_lower = page_name.lower()
     query_lower = (page_query or "").lower()
     combined_context = f"{page_lower} {query_lower}"
     
-    # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
+    # Search across multiple domains for page-specific guidance (one unified-index pass)
+    page_searches = search_all(combined_context, ["style", "ux", "landing"], k_per_domain={"style": 1, "ux": 3, "landing": 1})
+    style_search = page_searches["style"]
+    ux_search = page_searches["ux"]
+    landing_search = page_searches["landing"]
     
     # Extract results from search response
     style_results = style_search.get("results", [])
@@ -1019,24 +1206,10 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
 
 def _detect_page_type(context: str, style_results: list) -> str:
     """Detect page type from context and search results."""
-    context_lower = context.lower()
-    
-    # Check for common page type patterns
-    page_patterns = [
-        (["dashboard", "admin", "analytics", "data", "metrics", "stats", "monitor", "overview"], "Dashboard / Data View"),
-        (["checkout", "payment", "cart", "purchase", "order", "billing"], "Checkout / Payment"),
-        (["settings", "profile", "account", "preferences", "config"], "Settings / Profile"),
-        (["landing", "marketing", "homepage", "hero", "home", "promo"], "Landing / Marketing"),
-        (["login", "signin", "signup", "register", "auth", "password"], "Authentication"),
-        (["pricing", "plans", "subscription", "tiers", "packages"], "Pricing / Plans"),
-        (["blog", "article", "post", "news", "content", "story"], "Blog / Article"),
-        (["product", "item", "detail", "pdp", "shop", "store"], "Product Detail"),
-        (["search", "results", "browse", "filter", "catalog", "list"], "Search Results"),
-        (["empty", "404", "error", "not found", "zero"], "Empty State"),
-    ]
-    
-    for keywords, page_type in page_patterns:
-        if any(kw in context_lower for kw in keywords):
+    # Page types are checked in table order; the first with any keyword hit wins
+    counts = _PAGE_MATCHER.counts(context.lower())
+    for page_type, count in counts.items():
+        if count:
             return page_type
     
     # Fallback: try to infer from style results
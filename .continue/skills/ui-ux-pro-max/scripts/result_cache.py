@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Result Cache - persistent LRU of search results shared by CLI processes
+
+Entries live in one SQLite table keyed by a caller-built string (core uses the
+dataset, columns, normalised query tokens and max_results). Each entry carries
+the fingerprint of the data it was computed from; a lookup with a different
+fingerprint is a miss. The database runs in WAL mode with a busy timeout, so
+parallel processes can read and write it at once. Any SQLite or filesystem error
+turns the cache into a no-op instead of failing the search.
+"""
+
+import os
+import sqlite3
+import time
+
+BUSY_TIMEOUT = 5.0  # Seconds to wait for another process's write lock
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+class ResultCache:
+    """Size-bounded, least-recently-used result store in a SQLite file"""
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._conn = None
+        self._pid = None
+        self._broken = False
+
+    def _connect(self):
+        # Connections are not fork-safe; reopen in a child process (e.g. batch workers)
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get_many(self, keys, fingerprint):
+        """{key: payload} for the keys cached under this fingerprint; marks them recently used"""
+        if self._broken or not keys:
+            return {}
+        unique = list(dict.fromkeys(keys))
+        try:
+            conn = self._connect()
+            found = {}
+            for start in range(0, len(unique), 500):  # Stay under SQLite's bound-parameter limit
+                chunk = unique[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                found.update(conn.execute(
+                    f"SELECT key, payload FROM results WHERE fingerprint = ? AND key IN ({marks})",
+                    [fingerprint] + chunk))
+            if found:
+                now = time.time_ns()
+                conn.executemany("UPDATE results SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+            return found
+        except (sqlite3.Error, OSError):
+            self._broken = True
+            return {}
+
+    def put_many(self, items, fingerprint):
+        """Store {key: payload} and evict the least recently used entries beyond max_entries"""
+        if self._broken or not items:
+            return
+        try:
+            conn = self._connect()
+            now = time.time_ns()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("INSERT OR REPLACE INTO results (key, fingerprint, payload, last_used) VALUES (?, ?, ?, ?)",
+                                 [(key, fingerprint, payload, now) for key, payload in items.items()])
+                conn.execute("DELETE FROM results WHERE key IN "
+                             "(SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+        except (sqlite3.Error, OSError):
+            self._broken = True
+
+    def clear(self):
+        try:
+            self._connect().execute("DELETE FROM results")
+        except (sqlite3.Error, OSError):
+            self._broken = True
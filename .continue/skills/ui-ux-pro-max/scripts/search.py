@@ -2,23 +2,56 @@
 # -*- coding: utf-8 -*-
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
-Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+Usage: python search.py "<query>" [--domain <domain>|all] [--stack <stack>] [--max-results 3]
        python search.py "<query>" --design-system [-p "Project Name"]
-       python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
+       python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard" ["checkout" ...]]
+       python search.py --serve [--port 8765] [--watch]
+       python search.py "<query>" --server http://127.0.0.1:8765 [...]
+       python search.py --batch queries.jsonl [--workers 4] > results.jsonl
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
 Stacks: html-tailwind, react, nextjs
 
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
-  --page       Also create a page-specific override file in design-system/pages/
+  --page       Also create page-specific override files in design-system/pages/
+  --pages-file Read page names (one per line) from a manifest file
+
+Server mode (indexes stay in memory between queries):
+  --serve      Run a localhost JSON server (see service.py)
+  --watch      With --serve, re-index edited data CSVs in the background (inotify, else polling)
+  --server     Forward this query to a running server (or set UI_PRO_MAX_SERVER); searches locally
+               instead if the server runs with other --engine/--fuzzy/--data-dir settings, and
+               always for --persist
+
+Batch mode:
+  --batch      Read JSONL requests from a file (or stdin) and write JSONL results
+  --engine     "numpy" scores each batch as one sparse matrix product (needs NumPy)
+               "sqlite" queries SQLite FTS5 tables instead of in-memory indexes (build with core.py --build-fts)
+
+Extra data:
+  --data-dir   Merge another directory of guideline CSVs (same layout as data/) into every search;
+               repeatable, added to UI_PRO_MAX_DATA_DIRS
+
+Typo tolerance:
+  --fuzzy [N]  Expand unknown query words to vocabulary terms within N edits (default 2), or
+               to words they are the start of ("glasmorphism", "neumorph"); also UI_PRO_MAX_FUZZY=N
+
+Result cache:
+  --no-cache   Skip the on-disk cache of search results (also: UI_PRO_MAX_NO_CACHE=1)
+
+Profiling (spans from this process; see timings.py):
+  --timings    Print time per stage (CSV load, BM25 fit, scoring, reasoning, formatting, writes) to stderr
+  --trace      Write the spans to a Chrome trace-event JSON file
 """
 
 import argparse
+import os
 import sys
 import io
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+from core import (CSV_CONFIG, AVAILABLE_STACKS, DATA_DIRS, DEFAULT_ENGINE, ENGINES, FUZZY_DISTANCE, MAX_RESULTS,
+                  set_data_dirs, set_engine, set_fuzzy, set_result_cache)
+from service import DEFAULT_HOST, DEFAULT_PORT, SettingsMismatch, call, execute, run_batch, serve, settings
 
 # Force UTF-8 for stdout/stderr to handle emojis on Windows (cp1252 default)
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
@@ -53,10 +86,29 @@ def format_output(result):
     return "\n".join(output)
 
 
+def report_timings(recorder, show_summary, trace_path):
+    """Print the span summary to stderr and/or write the Chrome trace"""
+    if show_summary:
+        print(recorder.summary(), file=sys.stderr)
+    if trace_path:
+        recorder.write_trace(trace_path)
+
+
+def run_command(command, params, server=None):
+    """Run a command on the search server if given, else (or if unreachable or differently configured) in-process"""
+    if server:
+        try:
+            # --engine, --fuzzy and --data-dir travel along so the server can refuse if it differs
+            return call(server, command, dict(params, settings=settings()))
+        except (ConnectionError, SettingsMismatch) as e:
+            print(f"Warning: {e}; searching locally", file=sys.stderr)
+    return execute(command, params)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
-    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()) + ["all"], help="Search domain (\"all\" searches every domain in one pass)")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
@@ -66,49 +118,106 @@ if __name__ == "__main__":
     parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
     # Persistence (Master + Overrides pattern)
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
-    parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
+    parser.add_argument("--page", type=str, nargs="+", default=None, help="Create page-specific override files in design-system/pages/")
+    parser.add_argument("--pages-file", type=str, default=None, help="Manifest of page names (one per line) to create overrides for")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    # Long-running server
+    parser.add_argument("--serve", action="store_true", help="Run a search server that keeps all indexes in memory")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Server bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Server port (default: {DEFAULT_PORT})")
+    parser.add_argument("--watch", action="store_true", help="With --serve, reload datasets whose CSVs change (see watcher.py)")
+    parser.add_argument("--server", default=os.environ.get("UI_PRO_MAX_SERVER"), help="Forward the query to a running search server URL")
+
+    # Batch mode
+    parser.add_argument("--batch", nargs="?", const="-", default=None, metavar="FILE", help="Run JSONL requests from FILE (default: stdin), one JSON result per line")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for --batch (default: 1)")
+    parser.add_argument("--engine", choices=ENGINES, default=DEFAULT_ENGINE, help=f"Scoring engine (default: {DEFAULT_ENGINE}); numpy and sqlite fall back to python if NumPy or SQLite FTS5 is missing")
+    # Extra data
+    parser.add_argument("--data-dir", action="append", default=[], metavar="DIR", help="Extra data directory merged with the bundled CSVs (repeatable)")
+    # Typo tolerance
+    parser.add_argument("--fuzzy", type=int, nargs="?", const=2, default=FUZZY_DISTANCE, metavar="N", help="Expand misspelled or partial words to terms within N edits (default with flag: 2; 0 = off)")
+    # Result cache
+    parser.add_argument("--no-cache", action="store_true", default=bool(os.environ.get("UI_PRO_MAX_NO_CACHE")), help="Do not read or write the on-disk result cache")
+    # Profiling
+    parser.add_argument("--timings", action="store_true", help="Print time spent per stage to stderr")
+    parser.add_argument("--trace", type=str, default=None, metavar="FILE", help="Write stage timings as a Chrome trace-event JSON file")
 
     args = parser.parse_args()
+    set_engine(args.engine)
+    set_fuzzy(args.fuzzy)
+    if args.data_dir:
+        set_data_dirs(DATA_DIRS + [os.path.abspath(d) for d in args.data_dir])
+    if args.timings or args.trace:
+        import atexit
+        import timings
+        recorder = timings.Recorder()
+        timings.add_listener(recorder)
+        atexit.register(report_timings, recorder, args.timings, args.trace)
+
+    if args.serve:
+        # The server keeps indexes in memory; the result cache is for short-lived processes
+        serve(args.host, args.port, args.watch)
+        sys.exit(0)
+    set_result_cache(not args.no_cache)
+    if args.batch:
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout, args.workers)
+        else:
+            with open(args.batch, 'r', encoding='utf-8') as f:
+                run_batch(f, sys.stdout, args.workers)
+        sys.exit(0)
+    if not args.query:
+        parser.error("the following arguments are required: query")
+    pages = list(args.page or [])
+    if args.pages_file:
+        from design_system import load_pages_manifest
+        pages += load_pages_manifest(args.pages_file)
+
+    try:
+        # Design system takes priority
+        if args.design_system:
+            result = run_command("design_system", {
+                "query": args.query,
+                "project_name": args.project_name,
+                "output_format": args.format,
+                "persist": args.persist,
+                "page": pages,
+                "output_dir": os.path.abspath(args.output_dir or os.getcwd())
+            }, None if args.persist else args.server)  # Persisting writes local files: never forwarded
+        elif args.stack:
+            result = run_command("search_stack", {"query": args.query, "stack": args.stack, "max_results": args.max_results}, args.server)
+        else:
+            result = run_command("search", {"query": args.query, "domain": args.domain, "max_results": args.max_results}, args.server)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
-    # Design system takes priority
     if args.design_system:
-        result = generate_design_system(
-            args.query, 
-            args.project_name, 
-            args.format,
-            persist=args.persist,
-            page=args.page,
-            output_dir=args.output_dir
-        )
-        print(result)
+        print(result["output"])
         
         # Print persistence confirmation
         if args.persist:
+            persisted = result["persisted"]
+            base = persisted["design_system_dir"]
+            unchanged = {os.path.relpath(path, base) for path in persisted["unchanged_files"]}
+            mark = lambda name: " [unchanged]" if os.path.normpath(name) in unchanged else ""
             project_slug = args.project_name.lower().replace(' ', '-') if args.project_name else "default"
             print("\n" + "=" * 60)
             print(f"✅ Design system persisted to design-system/{project_slug}/")
-            print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
-            if args.page:
-                page_filename = args.page.lower().replace(' ', '-')
-                print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
+            print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth){mark('MASTER.md')}")
+            for page in pages:
+                page_filename = page.lower().replace(' ', '-')
+                print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides){mark(f'pages/{page_filename}.md')}")
+            print(f"   {len(persisted['written_files'])} written, {len(persisted['unchanged_files'])} unchanged")
             print("")
             print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
             print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
             print("=" * 60)
-    # Stack search
-    elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
-    # Domain search
+    # Stack / domain search
+    elif args.json:
+        import json
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.domain == "all" and not args.stack:
+        print("\n".join(format_output(r) for r in result.values()))
     else:
-        result = search(args.query, args.domain, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        print(format_output(result))
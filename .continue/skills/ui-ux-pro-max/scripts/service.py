@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Service - keeps every index warm in one long-running process
+and answers search requests as JSON over localhost HTTP.
+
+Usage:
+    python search.py --serve [--host 127.0.0.1] [--port 8765] [--watch]
+    python search.py "<query>" --server http://127.0.0.1:8765 [...]
+
+Protocol:
+    POST /search          {"query": ..., "domain": ..., "max_results": ...}
+                          (domain "all" -> {domain: response} for every domain)
+    POST /search_stack    {"query": ..., "stack": ..., "max_results": ...}
+    POST /design_system   {"query": ..., "project_name": ..., "output_format": ...,
+                           "persist": ..., "page": ..., "output_dir": ...}
+                          -> {"output": <formatted text>, "persisted": <persist report or null>}
+    GET  /health
+Responses are {"result": ...} on success or {"error": ...} with a 4xx/5xx status.
+A request may carry the client's "settings" (see settings()); if they differ
+from the server's, it is answered with 409 and the CLI searches locally.
+"persist" is only honoured for loopback clients (403 otherwise), and its files
+must land under the server's working directory (400 otherwise).
+With --watch, edited data CSVs are re-indexed in the background (see watcher.py).
+
+Batch mode reads the same requests as JSONL and writes one response per line:
+    python search.py --batch queries.jsonl [--workers 4] < or stdin >
+    {"query": "saas dashboard", "domain": "color", "max_results": 2}
+    {"query": "rerender", "stack": "react"}
+    {"query": "beauty spa", "design_system": true, "project_name": "Serenity"}
+A malformed record gets {"error": ...} on its own line and the batch carries on:
+    {"query": 123}                          -> 'query' must be a string
+    {"query": "glass", "max_results": "3"}  -> 'max_results' must be a non-negative integer
+    {"query": "hooks", "stack": ["react"]}  -> 'stack' must be a string
+
+The HTTP, urllib and process-pool modules are imported by the functions that
+use them, so a one-off CLI search does not pay for them.
+"""
+
+import json
+import os
+import sys
+
+import core
+from core import MAX_RESULTS, preload, search, search_all, search_many, search_stack, search_stack_many, set_engine
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+BATCH_CHUNK = 256  # Records read ahead and scored together in batch mode
+
+
+# ============ SETTINGS ============
+class SettingsMismatch(RuntimeError):
+    """The server searches with a different engine, fuzzy distance or extra data directories"""
+
+
+def settings():
+    """Process-wide options that change results; a forwarded request must match the server's"""
+    return {
+        "engine": core.DEFAULT_ENGINE,
+        "fuzzy": core.FUZZY_DISTANCE,
+        "data_dirs": [os.path.abspath(d) for d in core.DATA_DIRS]
+    }
+
+
+# ============ DISPATCH ============
+def _search(params):
+    if params.get("domain") == "all":
+        return search_all(params["query"], k_per_domain=params.get("max_results", MAX_RESULTS))
+    return search(params["query"], params.get("domain"), params.get("max_results", MAX_RESULTS))
+
+
+def _search_stack(params):
+    return search_stack(params["query"], params["stack"], params.get("max_results", MAX_RESULTS))
+
+
+def _design_system(params):
+    from design_system import generate_cached, persist_design_system, render_design_system
+    design_system = generate_cached(params["query"], params.get("project_name"))
+    persisted = None
+    if params.get("persist"):
+        persisted = persist_design_system(design_system, params.get("page"), params.get("output_dir"), params["query"])
+    return {
+        "output": render_design_system(design_system, params.get("output_format", "ascii")),
+        "persisted": persisted
+    }
+
+
+COMMANDS = {
+    "search": _search,
+    "search_stack": _search_stack,
+    "design_system": _design_system
+}
+
+
+def _valid_max_results(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def execute(command, params):
+    """Run one command with its parameters and return the result"""
+    if command not in COMMANDS:
+        raise ValueError(f"Unknown command: {command}. Available: {', '.join(COMMANDS)}")
+    if not params.get("query"):
+        raise ValueError("Missing 'query'")
+    if not isinstance(params["query"], str):
+        raise ValueError(f"'query' must be a string, got {params['query']!r}")
+    if "max_results" in params and not _valid_max_results(params["max_results"]):
+        raise ValueError(f"'max_results' must be a non-negative integer, got {params['max_results']!r}")
+    for field in ("domain", "stack", "project_name"):
+        if params.get(field) is not None and not isinstance(params[field], str):
+            raise ValueError(f"'{field}' must be a string, got {params[field]!r}")
+    return COMMANDS[command](params)
+
+
+def execute_record(record):
+    """Run one batch record and return its response envelope"""
+    try:
+        if not isinstance(record, dict):
+            raise ValueError("Record must be a JSON object")
+        if record.get("design_system"):
+            params = dict(record)
+            params.setdefault("output_format", record.get("format", "ascii"))
+            response = {"result": execute("design_system", params)}
+        elif record.get("stack"):
+            response = {"result": execute("search_stack", record)}
+        else:
+            response = {"result": execute("search", record)}
+    except (ValueError, KeyError, TypeError) as e:
+        response = {"error": str(e)}
+    except Exception as e:  # Anything else unexpected still stays with its record, as on the server
+        response = {"error": f"{type(e).__name__}: {e}"}
+    if isinstance(record, dict) and "id" in record:
+        response["id"] = record["id"]
+    return response
+
+
+# ============ BATCH ============
+def _parse_line(line):
+    """Decode one JSONL line, keeping decode errors as records to report"""
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return {"_invalid": f"Invalid JSON: {e}"}
+
+
+def _execute_line(record):
+    if isinstance(record, dict) and "_invalid" in record:
+        return {"error": record["_invalid"]}
+    return execute_record(record)
+
+
+def _search_group(record):
+    """Grouping key for plain search records that can be scored together, else None"""
+    if (not isinstance(record, dict) or "_invalid" in record or record.get("design_system")
+            or not isinstance(record.get("query"), str) or not record["query"]):
+        return None
+    max_results = record.get("max_results", MAX_RESULTS)
+    if not _valid_max_results(max_results):
+        return None
+    if record.get("stack"):
+        return ("search_stack", record["stack"], max_results) if isinstance(record["stack"], str) else None
+    domain = record.get("domain")
+    if domain == "all" or not (domain is None or isinstance(domain, str)):
+        return None
+    return ("search", domain, max_results)
+
+
+def execute_records(records):
+    """Responses for a list of parsed records; searches sharing a target are scored as one batch"""
+    responses = [None] * len(records)
+    groups = {}
+    for i, record in enumerate(records):
+        key = _search_group(record)
+        if key is None:
+            responses[i] = _execute_line(record)
+        else:
+            groups.setdefault(key, []).append(i)
+
+    for (command, target, max_results), positions in groups.items():
+        queries = [records[i]["query"] for i in positions]
+        if command == "search_stack":
+            results = search_stack_many(queries, target, max_results)
+        else:
+            results = search_many(queries, target, max_results)
+        for i, result in zip(positions, results):
+            responses[i] = {"result": result}
+            if "id" in records[i]:
+                responses[i]["id"] = records[i]["id"]
+    return responses
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker(engine, data_dirs, fuzzy):
+    """Carry the parent's engine, extra data directories and fuzzy setting into a batch worker"""
+    set_engine(engine)
+    core.set_data_dirs(data_dirs)
+    core.set_fuzzy(fuzzy)
+
+
+def run_batch(lines, out, workers=1):
+    """Execute JSONL requests from `lines`, writing JSONL responses to `out` in input order.
+
+    Records are processed in chunks of BATCH_CHUNK so searches against the same
+    dataset share one scoring pass (a single sparse product with --engine numpy).
+    With workers > 1 chunks are fanned out over a process pool; each worker keeps
+    its own loaded indexes for the whole batch.
+    """
+    chunks = _chunks((_parse_line(line) for line in lines if line.strip()), BATCH_CHUNK)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(core.DEFAULT_ENGINE, core.DATA_DIRS, core.FUZZY_DISTANCE)) as pool:
+            for responses in pool.map(execute_records, chunks):
+                for response in responses:
+                    out.write(json.dumps(response, ensure_ascii=False) + "\n")
+    else:
+        for chunk in chunks:
+            for response in execute_records(chunk):
+                out.write(json.dumps(response, ensure_ascii=False) + "\n")
+            out.flush()
+
+
+# ============ SERVER ============
+def _is_loopback(host):
+    import ipaddress
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    mapped = getattr(address, "ipv4_mapped", None)
+    return (mapped or address).is_loopback
+
+
+def _confine_persist(params, root, peer):
+    """Params of a persisting design_system request, with output_dir resolved under root.
+
+    Raises PermissionError for a non-loopback peer and ValueError if any file
+    (MASTER.md, page overrides) would be written outside root.
+    """
+    from pathlib import Path
+    from design_system import page_slug
+    if not _is_loopback(peer):
+        raise PermissionError("'persist' is only accepted from loopback clients")
+    output_dir = params.get("output_dir") or "."
+    pages = params.get("page") or []
+    pages = [pages] if isinstance(pages, str) else pages
+    if not isinstance(output_dir, str) or not isinstance(pages, list) or not all(isinstance(p, str) for p in pages):
+        raise ValueError("'output_dir' must be a string and 'page' a string or list of strings")
+    project_name = str(params.get("project_name") or str(params.get("query", "")).upper())
+    root = root.resolve()
+    base_dir = (root / output_dir).resolve()
+    design_system_dir = base_dir / "design-system" / page_slug(project_name)
+    targets = [design_system_dir / "MASTER.md"] + [design_system_dir / "pages" / f"{page_slug(p)}.md" for p in pages if p]
+    for target in targets:
+        if not target.resolve().is_relative_to(root):
+            raise ValueError(f"Refusing to write outside {root}: {target}")
+    return dict(params, output_dir=str(base_dir))
+
+
+def _handler_class():
+    """JSON request handler class (defined on demand to keep http.server out of plain searches)"""
+    from http.server import BaseHTTPRequestHandler
+
+    class _Handler(BaseHTTPRequestHandler):
+        """JSON request handler; one thread per connection"""
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {"result": "ok"})
+            else:
+                self._reply(404, {"error": f"Not found: {self.path}"})
+
+        def do_POST(self):
+            command = self.path.strip("/")
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                params = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(params, dict):
+                    raise ValueError("Request body must be a JSON object")
+                client_settings = params.pop("settings", None)
+                if client_settings is not None and client_settings != settings():
+                    raise SettingsMismatch(f"Server settings {settings()} differ from the request's {client_settings}")
+                if command == "design_system" and params.get("persist"):
+                    params = _confine_persist(params, self.server.output_root, self.client_address[0])
+                result = execute(command, params)
+            except PermissionError as e:
+                self._reply(403, {"error": str(e)})
+            except SettingsMismatch as e:
+                self._reply(409, {"error": str(e)})
+            except (ValueError, KeyError) as e:
+                self._reply(400, {"error": str(e)})
+            except Exception as e:
+                self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+            else:
+                self._reply(200, {"result": result})
+
+        def log_message(self, format, *args):
+            pass
+
+    return _Handler
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, watch=False):
+    """Preload all indexes and serve requests until interrupted; watch reloads edited datasets.
+
+    Persisted design systems are confined to the current working directory.
+    """
+    from http.server import ThreadingHTTPServer
+    from pathlib import Path
+    preload()
+    data_watcher = None
+    if watch:
+        import watcher
+        data_watcher = watcher.start(on_reload=lambda tags: print(f"Reloaded: {', '.join(tags)}", file=sys.stderr))
+    server = ThreadingHTTPServer((host, port), _handler_class())
+    server.daemon_threads = True
+    server.output_root = Path.cwd()
+    print(f"UI Pro Max search server listening on http://{host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if data_watcher is not None:
+            data_watcher.stop()
+
+
+# ============ CLIENT ============
+def call(url, command, params, timeout=30):
+    """Send one command to a running server and return its result.
+
+    Raises ConnectionError if the server cannot be reached, SettingsMismatch
+    if it runs with different settings than params["settings"], and
+    RuntimeError if it reports another error.
+    """
+    from urllib import request as urlrequest
+    from urllib.error import HTTPError, URLError
+    data = json.dumps(params).encode('utf-8')
+    req = urlrequest.Request(f"{url.rstrip('/')}/{command}", data=data,
+                             headers={"Content-Type": "application/json"})
+    try:
+        with urlrequest.urlopen(req, timeout=timeout) as resp:
+            payload = json.loads(resp.read())
+    except HTTPError as e:
+        try:
+            message = json.loads(e.read()).get("error", str(e))
+        except ValueError:
+            message = str(e)
+        if e.code == 409:
+            raise SettingsMismatch(message)
+        raise RuntimeError(message)
+    except (URLError, OSError) as e:
+        raise ConnectionError(f"Cannot reach search server at {url}: {getattr(e, 'reason', e)}")
+    return payload["result"]
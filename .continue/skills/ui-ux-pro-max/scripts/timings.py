@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Timings - lightweight spans around search and design-system stages
+
+Usage:
+    import timings
+    with timings.record() as recorder:
+        generate_design_system("SaaS dashboard")
+    print(recorder.summary())
+    recorder.write_trace("trace.json")    # open in chrome://tracing or Perfetto
+
+    timings.add_listener(callback)        # callback(span) for every finished span
+
+Spans cost one function call while no listener is registered.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+# start is a time.perf_counter() value; duration is in seconds
+Span = namedtuple("Span", "name start duration thread args")
+
+_listeners = []
+
+
+# ============ SPANS ============
+class _ActiveSpan:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        finished = Span(self.name, self.start, end - self.start, threading.get_ident(), self.args)
+        for listener in list(_listeners):
+            listener(finished)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """Context manager timing one stage; a shared no-op when nobody is listening"""
+    if not _listeners:
+        return _NULL_SPAN
+    return _ActiveSpan(name, args)
+
+
+def enabled():
+    return bool(_listeners)
+
+
+def add_listener(listener):
+    """Call listener(span) for every span finished from now on (in the finishing thread)"""
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+# ============ RECORDER ============
+class Recorder:
+    """Listener that keeps every span, for a stderr summary or a Chrome trace file"""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def __call__(self, finished):
+        with self._lock:
+            self.spans.append(finished)
+
+    def totals(self):
+        """{name: (count, total seconds, max seconds)}, slowest total first"""
+        totals = {}
+        for s in self.spans:
+            count, total, longest = totals.get(s.name, (0, 0.0, 0.0))
+            totals[s.name] = (count + 1, total + s.duration, max(longest, s.duration))
+        return dict(sorted(totals.items(), key=lambda item: -item[1][1]))
+
+    def summary(self):
+        """Human-readable table of time spent per span name"""
+        lines = [f"{'span':<24} {'calls':>6} {'total ms':>10} {'max ms':>10}"]
+        for name, (count, total, longest) in self.totals().items():
+            lines.append(f"{name:<24} {count:>6} {total * 1000:>10.3f} {longest * 1000:>10.3f}")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Spans as Chrome trace-event "complete" events (timestamps in microseconds)"""
+        origin = min((s.start for s in self.spans), default=0.0)
+        pid = os.getpid()
+        events = [{
+            "name": s.name,
+            "cat": "ui-pro-max",
+            "ph": "X",
+            "ts": round((s.start - origin) * 1e6, 3),
+            "dur": round(s.duration * 1e6, 3),
+            "pid": pid,
+            "tid": s.thread,
+            "args": {k: v if isinstance(v, (str, int, float, bool)) or v is None else str(v) for k, v in s.args.items()}
+        } for s in sorted(self.spans, key=lambda s: s.start)]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+            f.write("\n")
+
+
+@contextmanager
+def record(recorder=None):
+    """Register a Recorder (a new one by default) for the duration of the block"""
+    recorder = recorder if recorder is not None else Recorder()
+    add_listener(recorder)
+    try:
+        yield recorder
+    finally:
+        remove_listener(recorder)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Watcher - hot reload of changed datasets in long-running processes
+
+Usage:
+    import watcher
+    w = watcher.start()                  # inotify on Linux, polling elsewhere
+    ...                                  # search() / generate_cached() as usual
+    w.stop()
+
+    python search.py --serve --watch
+
+While the watcher runs, queries use the loaded indexes without checking their
+files. A background thread waits for CSV changes under data/, data/stacks/ and
+the extra data directories, rebuilds only the datasets that changed and swaps
+each new index in with one assignment (core.reload_changed()); queries in
+flight finish on the index they started with. The design-system memo follows,
+since core.data_version() reports the loaded versions.
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+
+import core
+from timings import span
+
+POLL_INTERVAL = 1.0  # Seconds between scans without inotify (and between stop checks with it)
+DEBOUNCE = 0.2       # Quiet period after a change before rebuilding (editors write in bursts)
+
+# inotify(7) constants
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_IGNORED = 0x8000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+               | _IN_DELETE_SELF | _IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+
+# ============ CHANGE SOURCES ============
+class _Inotify:
+    """Directory watches through libc's inotify calls (Linux only)"""
+
+    def __init__(self):
+        import ctypes
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def watch(self, directories):
+        """Add a watch per directory (adding one twice is harmless)"""
+        for directory in directories:
+            if self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK) < 0:
+                raise OSError(f"Cannot watch {directory}")
+
+    def wait(self, timeout):
+        """True if a CSV or a directory changed within timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        changed, offset = False, 0
+        while offset + _EVENT.size <= len(buf):
+            _, mask, _, length = _EVENT.unpack_from(buf, offset)
+            name = buf[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            # Directory events may add or remove extension folders; watches may have been dropped
+            if name.endswith(b".csv") or mask & (_IN_ISDIR | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED):
+                changed = True
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Poller:
+    """Fallback change source: every interval is treated as a possible change"""
+
+    def watch(self, directories):
+        pass
+
+    def wait(self, timeout):
+        return True
+
+    def close(self):
+        pass
+
+
+def _change_source(use_inotify):
+    if use_inotify is not False and sys.platform.startswith("linux"):
+        try:
+            return _Inotify()
+        except (OSError, AttributeError):  # No libc or no inotify: poll
+            if use_inotify:
+                raise
+    return _Poller()
+
+
+# ============ WATCHER ============
+class Watcher:
+    """Background thread that keeps the loaded indexes in step with the data files.
+
+    on_reload(tags) is called from that thread after datasets were swapped in.
+    """
+
+    def __init__(self, interval=POLL_INTERVAL, use_inotify=None, on_reload=None):
+        self.interval = interval
+        self.on_reload = on_reload
+        self._source = _change_source(use_inotify)
+        self.mode = "inotify" if isinstance(self._source, _Inotify) else "poll"
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ui-pro-max-watcher", daemon=True)
+
+    def start(self):
+        self._source.watch(core.watch_dirs())
+        core.set_watched(True)
+        self.check()  # Anything that changed before the watches existed
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop watching; queries go back to checking the files themselves"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        core.set_watched(False)
+        self._source.close()
+
+    def check(self):
+        """Reload the datasets that changed now; returns their tags"""
+        with span("watch.reload"):
+            reloaded = core.reload_changed()
+        if reloaded and self.on_reload:
+            self.on_reload(reloaded)
+        return reloaded
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.mode == "poll":
+                if self._stop.wait(self.interval):
+                    break
+            elif not self._source.wait(self.interval):
+                continue
+            else:
+                while self._source.wait(DEBOUNCE) and not self._stop.is_set():
+                    pass
+            try:
+                self._source.watch(core.watch_dirs())  # Picks up extension folders created meanwhile
+                self.check()
+            except Exception as e:  # e.g. a CSV caught half-written: keep the old index, retry on the next change
+                print(f"Warning: dataset reload failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+
+def start(interval=POLL_INTERVAL, use_inotify=None, on_reload=None):
+    """Create and start a Watcher"""
+    return Watcher(interval, use_inotify, on_reload).start()